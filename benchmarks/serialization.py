@@ -0,0 +1,96 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Serialization Benchmark
+
+Measures the cost of rendering 10k items as JSON, the way the list routes
+did with marshal_list_with and the way they do now with orjson. No database
+is needed, the items are built in memory.
+
+    python -m benchmarks.serialization [--items 10000] [--repeat 5]
+"""
+import argparse
+import json
+import timeit
+from decimal import Decimal
+from flask import Flask
+from flask_restx import marshal
+from service import config
+from service.models import Item, ItemStatus
+from service.common.serialization import dumps
+
+
+def build_items(count) -> list:
+    """Returns unsaved items with the values a wishlist would hold"""
+    statuses = list(ItemStatus)
+    return [
+        Item(
+            id=number,
+            wishlist_id=1 + number // 100,
+            name=f"item-{number}",
+            description=f"The description of item {number}",
+            price=Decimal(number % 1000) + Decimal("0.99"),
+            status=statuses[number % len(statuses)],
+        )
+        for number in range(count)
+    ]
+
+
+def marshalled(items, model) -> bytes:
+    """Renders items like marshal_list_with and the flask-restx JSON output"""
+    documents = marshal([item.serialize() for item in items], model)
+    return (json.dumps(documents) + "\n").encode("utf-8")
+
+
+def encoded(items) -> bytes:
+    """Renders items like the list routes do"""
+    return dumps([item.serialize() for item in items])
+
+
+def serialized(items) -> list:
+    """Builds the dictionaries only, the cost both paths share"""
+    return [item.serialize() for item in items]
+
+
+def main():
+    """Runs the benchmark and prints the milliseconds per 10k items"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(config)
+    with app.app_context():
+        from service.routes import item_model  # pylint: disable=import-outside-toplevel
+
+        items = build_items(args.items)
+        assert json.loads(marshalled(items, item_model)) == json.loads(encoded(items))
+        cases = {
+            "serialize() only": lambda: serialized(items),
+            "before: marshal + json": lambda: marshalled(items, item_model),
+            "after: orjson": lambda: encoded(items),
+        }
+        scale = 10_000 / args.items
+        print(f"{args.items} items, best of {args.repeat} runs, ms per 10k items")
+        for name, case in cases.items():
+            best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+            print(f"  {name:<24} {best * 1000 * scale:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Gunicorn configuration
+
+Gunicorn loads this file from the working directory. The app is loaded
+once in the master, which waits for the database, and the workers are
+forked from it with their own database connections.
+
+When the PROMETHEUS_MULTIPROC_DIR environment variable is set every worker
+writes its metrics to that directory, so it is emptied when the server
+starts and the files of a worker are retired when it exits.
+
+Threads do not survive a fork, so the expiry scheduler is started in every
+worker after it was forked, when EXPIRY_INTERVAL is set
+"""
+
+import glob
+import os
+from prometheus_client import multiprocess
+
+preload_app = True  # pylint: disable=invalid-name
+
+
+def on_starting(_server):
+    """Removes the metrics of a previous run of the server"""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        # the files of this process belong to the app it already loaded
+        own = f"_{os.getpid()}.db"
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            if not path.endswith(own):
+                os.remove(path)
+
+
+def post_fork(_server, _worker):
+    """Drops the connections a worker inherited from the master
+
+    A connection shared by two processes mixes up their conversations with
+    the database, so every worker opens its own
+    """
+    import wsgi  # pylint: disable=import-outside-toplevel
+    from service.models import db  # pylint: disable=import-outside-toplevel
+    from service.common.expiry import sweeper  # pylint: disable=import-outside-toplevel
+
+    with wsgi.app.app_context():
+        db.engine.dispose(close=False)
+    sweeper.start()
+
+
+def child_exit(_server, worker):
+    """Stops reporting the live gauges of a worker that exited"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
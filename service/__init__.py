@@ -38,9 +38,15 @@ def create_app():
 
     # Initialize Plugins
     # pylint: disable=import-outside-toplevel
-    from service.models import db
+    from service.models import db, connect_db
+    from service.common.cache import cache
+    from service.common.metrics import metrics
+    from service.common.profiling import profiler
+    from service.common.expiry import sweeper
 
     db.init_app(app)
+    cache.init_app(app)
+    sweeper.init_app(app)
 
     with app.app_context():
         # Dependencies require we import the routes AFTER the Flask app is created
@@ -48,8 +54,14 @@ def create_app():
         from service import routes, models  # noqa: F401 E402
         from service.common import error_handlers, cli_commands  # noqa: F401, E402
 
+        metrics.init_app(app, db.engine)
+        profiler.init_app(app, db.engine)
+
+        # gunicorn preloads the app (see gunicorn.conf.py), so this runs once
+        # in the master. The schema is not touched here, it is created and
+        # upgraded by the migrations of flask db-upgrade before a deploy
         try:
-            db.create_all()
+            connect_db(app)
         except Exception as error:  # pylint: disable=broad-except
             app.logger.critical("%s: Cannot continue", error)
             # gunicorn requires exit code 4 to stop spawning workers when they die
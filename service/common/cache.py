@@ -0,0 +1,184 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Cache
+
+This module contains a read-through cache for serialized resources with
+an in-process LRU backend and a Redis backend shared by all workers
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("flask.app")
+
+
+class NullCache:
+    """A cache that never holds anything, used when caching is turned off"""
+
+    def get(self, key):  # pylint: disable=unused-argument
+        """Returns the cached value of a key, always None"""
+        return None
+
+    def set(self, key, value):
+        """Stores the value of a key, does nothing"""
+
+    def delete(self, *keys):
+        """Removes keys from the cache, does nothing"""
+
+    def clear(self):
+        """Removes every key from the cache, does nothing"""
+
+
+class LRUCache:
+    """An in-process least recently used cache whose entries expire"""
+
+    def __init__(self, maxsize=1024, ttl=30, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached value of a key or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= self.timer():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Stores the value of a key, evicting the least recently used key"""
+        with self._lock:
+            self._entries[key] = (self.timer() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        """Removes keys from the cache"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """Removes every key from the cache"""
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCache:
+    """A cache that keeps JSON values in Redis so that every worker shares it
+
+    Args:
+        client: a redis.Redis client, or any object with the same get, set,
+            delete and scan_iter methods
+        ttl (int): number of seconds a value is kept
+        prefix (string): namespace of the keys of this service
+    """
+
+    def __init__(self, client, ttl=30, prefix="wishlists:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        """Returns the cached value of a key or None when missing"""
+        value = self.client.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value):
+        """Stores the value of a key for ttl seconds"""
+        self.client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    def delete(self, *keys):
+        """Removes keys from the cache"""
+        if keys:
+            self.client.delete(*[self.prefix + key for key in keys])
+
+    def clear(self):
+        """Removes every key of this service from the cache"""
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+def connect_redis(url):
+    """Returns a Redis client for the url, redis is only needed for this backend"""
+    import redis  # pylint: disable=import-outside-toplevel
+
+    return redis.Redis.from_url(url, socket_timeout=1)
+
+
+class Cache:
+    """The cache used by the service, backed by the configured backend
+
+    A failing backend never fails a request: reads are treated as misses and
+    writes are skipped, so the service keeps working from the database
+    """
+
+    def __init__(self):
+        self.backend = NullCache()
+
+    def init_app(self, app):
+        """Creates the backend named by the CACHE_BACKEND setting"""
+        backend = app.config["CACHE_BACKEND"]
+        ttl = app.config["CACHE_TTL"]
+        if backend == "redis":
+            self.backend = RedisCache(connect_redis(app.config["REDIS_URI"]), ttl)
+        elif backend == "memory":
+            self.backend = LRUCache(app.config["CACHE_MAXSIZE"], ttl)
+        else:
+            self.backend = NullCache()
+        logger.info("Cache backend: %s", type(self.backend).__name__)
+
+    def get(self, key):
+        """Returns the cached value of a key or None"""
+        try:
+            return self.backend.get(key)
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning("Cache read of %s failed: %s", key, error)
+            return None
+
+    def set(self, key, value):
+        """Stores the value of a key"""
+        try:
+            self.backend.set(key, value)
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning("Cache write of %s failed: %s", key, error)
+
+    def delete(self, *keys):
+        """Removes keys from the cache"""
+        try:
+            self.backend.delete(*keys)
+        except Exception as error:  # pylint: disable=broad-except
+            logger.warning("Cache invalidation of %s failed: %s", keys, error)
+
+    def clear(self):
+        """Removes every key from the cache"""
+        self.backend.clear()
+
+
+# The cache object is initialized later in create_app()
+cache = Cache()
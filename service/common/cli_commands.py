@@ -16,8 +16,21 @@
 """
 Flask CLI Command Extensions
 """
+import csv
+import json
+import time
+from datetime import timedelta
+from itertools import groupby
+import click
 from flask import current_app as app  # Import Flask application
-from service.models import db
+from service.models import db, Wishlist, DataValidationError
+from service.common.migrations import upgrade
+from service.common.expiry import sweeper
+
+# columns of a CSV import, one row per item and consecutive rows with the
+# same wishlist columns belong to the same wishlist
+CSV_WISHLIST_COLUMNS = ("name", "userid", "date_created")
+CSV_ITEM_COLUMNS = ("item_name", "item_description", "item_price", "item_status")
 
 
 ######################################################################
@@ -28,9 +41,196 @@ from service.models import db
 @app.cli.command("db-create")
 def db_create():
     """
-    Recreates a local database. You probably should not use this on
-    production. ;-)
+    Recreates a local database from the migrations. You probably should not
+    use this on production. ;-)
     """
     db.drop_all()
-    db.create_all()
+    db.session.execute(db.text("DROP TABLE IF EXISTS schema_migrations"))
     db.session.commit()
+    upgrade(db.engine)
+
+
+######################################################################
+# Command to apply the schema migrations the database is missing
+# Usage:
+#   flask db-upgrade [--target VERSION]
+######################################################################
+@app.cli.command("db-upgrade")
+@click.option(
+    "--target", type=int, default=None, help="Last version to apply, default all"
+)
+def db_upgrade(target):
+    """Applies the missing schema migrations"""
+    applied = upgrade(db.engine, target)
+    for migration in applied:
+        click.echo(f"Applied {migration.version}: {migration.description}")
+    if not applied:
+        click.echo("The schema is up to date")
+
+
+######################################################################
+# Command to export all wishlists as NDJSON
+# Usage:
+#   flask wishlists-export [--output FILE]
+######################################################################
+@app.cli.command("wishlists-export")
+@click.option(
+    "--output", type=click.File("w"), default="-", help="File to write, default stdout"
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=lambda: app.config["EXPORT_BATCH_SIZE"],
+    help="Number of wishlists fetched per round trip",
+)
+def wishlists_export(output, batch_size):
+    """
+    Writes every wishlist with its items as one JSON document per line
+    """
+    for wishlist in Wishlist.stream(batch_size):
+        output.write(json.dumps(wishlist.serialize()) + "\n")
+
+
+######################################################################
+# Command to import wishlists from an NDJSON or CSV file
+# Usage:
+#   flask wishlists-import FILE [--format ndjson|csv] [--chunk-size N]
+######################################################################
+@app.cli.command("wishlists-import")
+@click.argument("source", type=click.File("r"))
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["ndjson", "csv"]),
+    help="Format of the file, guessed from its extension by default",
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=1000,
+    help="Number of wishlists inserted per transaction",
+)
+def wishlists_import(source, file_format, chunk_size):
+    """
+    Imports wishlists with their items from an NDJSON or CSV file
+
+    The file is read one record at a time and every wishlist is validated
+    before it is inserted, records that are not valid or that the database
+    rejects are reported and skipped
+    """
+    if file_format is None:
+        file_format = "csv" if source.name.lower().endswith(".csv") else "ndjson"
+    records = read_csv(source) if file_format == "csv" else read_ndjson(source)
+
+    started = time.monotonic()
+    counts = {"wishlists": 0, "items": 0, "skipped": 0}
+    chunk = []
+    for line, document in records:
+        try:
+            chunk.append((line, Wishlist.from_document(document)))
+        except (DataValidationError, ValueError) as error:
+            skip_record(line, error, counts)
+        if len(chunk) >= chunk_size:
+            import_chunk(chunk, counts)
+            chunk = []
+    import_chunk(chunk, counts)
+
+    elapsed = max(time.monotonic() - started, 1e-6)
+    rows = counts["wishlists"] + counts["items"]
+    click.echo(
+        f"Imported {counts['wishlists']} wishlists and {counts['items']} items, "
+        f"skipped {counts['skipped']} records in {elapsed:.2f}s "
+        f"({rows / elapsed:.0f} rows/sec)"
+    )
+
+
+######################################################################
+# Command to expire the items that stayed pending for too long
+# Usage:
+#   flask items-expire [--days DAYS] [--batch-size SIZE]
+######################################################################
+@app.cli.command("items-expire")
+@click.option(
+    "--days",
+    type=click.FloatRange(min=0),
+    default=None,
+    help="Days without an update, default EXPIRY_AFTER_DAYS",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Items per transaction, default EXPIRY_BATCH_SIZE",
+)
+def items_expire(days, batch_size):
+    """Expires the PENDING items that were not updated for too long"""
+    older_than = None if days is None else timedelta(days=days)
+    expired = sweeper.sweep(older_than, batch_size)
+    if expired is None:
+        click.echo("Another process is expiring items")
+    else:
+        click.echo(f"Expired {expired} items")
+
+
+def import_chunk(chunk, counts):
+    """Inserts a chunk of wishlists and adds them to the import counts
+
+    A chunk the database rejects is rolled back and its wishlists are
+    inserted one at a time, so that only the records it rejects are skipped
+
+    Args:
+        chunk (list): the line number and Wishlist of every record
+        counts (dict): the counts of imported and skipped records
+    """
+    if not chunk:
+        return
+    wishlists = [wishlist for _, wishlist in chunk]
+    try:
+        Wishlist.create_many(wishlists)
+    except DataValidationError as error:
+        if len(chunk) == 1:
+            skip_record(chunk[0][0], error, counts)
+            return
+        for record in chunk:
+            import_chunk([record], counts)
+        return
+    counts["wishlists"] += len(wishlists)
+    counts["items"] += sum(len(wishlist.items) for wishlist in wishlists)
+
+
+def skip_record(line, error, counts):
+    """Reports a record that is not imported and counts it as skipped"""
+    counts["skipped"] += 1
+    click.echo(f"Skipping record at line {line}: {error}", err=True)
+
+
+def read_ndjson(source):
+    """Yields the line number and document of every line of an NDJSON file"""
+    for line, text in enumerate(source, start=1):
+        if not text.strip():
+            continue
+        try:
+            yield line, json.loads(text)
+        except ValueError:
+            yield line, None
+
+
+def read_csv(source):
+    """Yields the line number and wishlist document of every wishlist of a CSV file"""
+    rows = enumerate(csv.DictReader(source), start=2)
+    for key, group in groupby(
+        rows, key=lambda row: tuple(row[1].get(col) for col in CSV_WISHLIST_COLUMNS)
+    ):
+        group = list(group)
+        document = dict(zip(CSV_WISHLIST_COLUMNS, key))
+        document["items"] = [
+            {
+                "name": row["item_name"],
+                "description": row.get("item_description"),
+                "price": row.get("item_price"),
+                "status": row.get("item_status") or "pending",
+            }
+            for _, row in group
+            if row.get("item_name")
+        ]
+        yield group[0][0], document
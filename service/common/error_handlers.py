@@ -18,7 +18,7 @@ Module: error_handlers
 """
 from flask import jsonify
 from flask import current_app as app  # Import Flask application
-from service.models import DataValidationError
+from service.models import DataValidationError, StaleVersionError
 from . import status
 
 
@@ -31,6 +31,12 @@ def request_validation_error(error):
     return bad_request(error)
 
 
+@app.errorhandler(StaleVersionError)
+def stale_version_error(error):
+    """Handles updates that lost a race with another update"""
+    return precondition_failed(error)
+
+
 @app.errorhandler(status.HTTP_400_BAD_REQUEST)
 def bad_request(error):
     """Handles bad requests with 400_BAD_REQUEST"""
@@ -55,6 +61,21 @@ def not_found(error):
     )
 
 
+@app.errorhandler(status.HTTP_412_PRECONDITION_FAILED)
+def precondition_failed(error):
+    """Handles stale If-Match preconditions with 412_PRECONDITION_FAILED"""
+    message = str(error)
+    app.logger.warning(message)
+    return (
+        jsonify(
+            status=status.HTTP_412_PRECONDITION_FAILED,
+            error="Precondition Failed",
+            message=message,
+        ),
+        status.HTTP_412_PRECONDITION_FAILED,
+    )
+
+
 '''
 @app.errorhandler(status.HTTP_405_METHOD_NOT_ALLOWED)
 def method_not_supported(error):
@@ -0,0 +1,148 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Expiry
+
+This module contains the sweeper that expires the items that stayed
+PENDING without an update for too long. A sweep walks the stale items in
+keyset order and expires them in batches, each in its own short
+transaction, and pauses between batches so that the online API keeps the
+database. A Postgres advisory lock lets only one process sweep at a time,
+whether it is flask items-expire or the scheduler of a gunicorn worker
+"""
+import logging
+import threading
+from datetime import timedelta
+from sqlalchemy import text
+from service.models import db, Item, ItemStatus
+
+logger = logging.getLogger("flask.app")
+
+# Key of the advisory lock held while sweeping
+LOCK_KEY = 7_242_002
+
+
+class ExpirySweeper:
+    """Expires stale items in rate limited batches, one process at a time"""
+
+    def __init__(self):
+        self.app = None
+        self.older_than = timedelta(days=30)
+        self.batch_size = 1000
+        self.batch_delay = 0.1
+        self.interval = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        """Reads the expiry settings of the app"""
+        self.app = app
+        self.older_than = timedelta(days=app.config["EXPIRY_AFTER_DAYS"])
+        self.batch_size = app.config["EXPIRY_BATCH_SIZE"]
+        self.batch_delay = app.config["EXPIRY_BATCH_DELAY"]
+        self.interval = app.config["EXPIRY_INTERVAL"]
+
+    def sweep(self, older_than=None, batch_size=None):
+        """Expires the stale items unless another process is sweeping
+
+        Args:
+            older_than (timedelta): how long the items were not updated
+            batch_size (int): the number of items expired per transaction
+
+        Returns:
+            the number of expired items, None when another process is sweeping
+        """
+        with db.engine.connect() as conn:
+            # a session lock outlives the transactions of the batches
+            locked = conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": LOCK_KEY}
+            ).scalar()
+            conn.commit()
+            if not locked:
+                logger.info("Skipping the expiry sweep, another process is sweeping")
+                return None
+            try:
+                return self.expire(
+                    self.older_than if older_than is None else older_than,
+                    self.batch_size if batch_size is None else batch_size,
+                )
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+                conn.commit()
+
+    def expire(self, older_than, batch_size) -> int:
+        """Expires the PENDING items not updated for older_than, batch by batch"""
+        logger.info("Expiring items not updated for %s ...", older_than)
+        expired = 0
+        after = None
+        while True:
+            page = Item.find_stale(ItemStatus.PENDING, older_than, after, batch_size)
+            if not page:
+                break
+            # the status and age are checked again, so an item that was
+            # updated since the page was read is left alone
+            count, _ = Item.transition(
+                ItemStatus.EXPIRED,
+                ids=[row.id for row in page],
+                status=ItemStatus.PENDING,
+                older_than=older_than,
+                batch_size=batch_size,
+                max_ids=0,
+            )
+            expired += count
+            logger.info("Expired %d of a batch of %d items", count, len(page))
+            if len(page) < batch_size or self._stop.wait(self.batch_delay):
+                break
+            after = (page[-1].updated_at, page[-1].id)
+        db.session.rollback()
+        logger.info("Expired %d items", expired)
+        return expired
+
+    def start(self) -> None:
+        """Sweeps every EXPIRY_INTERVAL seconds in a background thread
+
+        Every worker runs the scheduler and the advisory lock elects the one
+        that sweeps, the others skip their turn while it holds the lock
+        """
+        if self.app is None or self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run, name="expiry-sweeper", daemon=True
+        )
+        self._thread.start()
+        logger.info("Expiry sweeper started, every %d seconds", self.interval)
+
+    def stop(self) -> None:
+        """Stops the background thread, a running sweep ends after its batch"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run(self) -> None:
+        """Sweeps every interval until stopped"""
+        while not self._stop.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    self.sweep()
+            except Exception as error:  # pylint: disable=broad-except
+                logger.error("Expiry sweep failed: %s", error)
+
+
+# The sweeper is initialized later in create_app()
+sweeper = ExpirySweeper()
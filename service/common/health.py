@@ -0,0 +1,82 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Health
+
+This module contains the readiness check, which tells whether a worker
+can reach the database through its connection pool
+"""
+import logging
+import threading
+import time
+from sqlalchemy import text
+from service.common.pool import pool_status
+
+logger = logging.getLogger("flask.app")
+
+
+def pool_saturation(pool) -> dict:
+    """Returns the status of a pool with the share of its connections in use"""
+    status = pool_status(pool)
+    if "size" in status:
+        capacity = status["size"] + status["max_overflow"]
+        status["saturation"] = round(status["checked_out"] / capacity, 3)
+    return status
+
+
+def check_database(engine, timeout_ms) -> dict:
+    """Runs SELECT 1 on a pooled connection, canceled after timeout_ms
+
+    An exhausted pool is reported without waiting for a connection, a probe
+    must not queue behind the requests it is meant to protect
+    """
+    pool = pool_saturation(engine.pool)
+    if pool.get("saturation", 0) >= 1:
+        return {"ready": False, "database": "connection pool exhausted", "pool": pool}
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(f"SET LOCAL statement_timeout = {int(timeout_ms)}"))
+            conn.execute(text("SELECT 1"))
+    except Exception as error:  # pylint: disable=broad-except
+        logger.warning("Readiness check failed: %s", error)
+        return {"ready": False, "database": str(error), "pool": pool}
+    return {"ready": True, "database": "ok", "pool": pool}
+
+
+class ReadinessCheck:
+    """Checks the database at most once per ttl seconds
+
+    Concurrent probes wait for the check that is running instead of starting
+    their own, so probes add at most one query per ttl to each worker
+    """
+
+    def __init__(self, timer=time.monotonic):
+        self.timer = timer
+        self._lock = threading.Lock()
+        self._result = None
+        self._expires = 0.0
+
+    def check(self, engine, timeout_ms, ttl) -> dict:
+        """Returns the result of the last check or of a new one once it expired"""
+        with self._lock:
+            if self._result is None or self._expires <= self.timer():
+                self._result = check_database(engine, timeout_ms)
+                self._expires = self.timer() + ttl
+            return self._result
+
+
+readiness = ReadinessCheck()
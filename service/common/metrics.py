@@ -0,0 +1,148 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Metrics
+
+This module contains the Prometheus metrics of the service. When the
+PROMETHEUS_MULTIPROC_DIR environment variable names a directory every
+gunicorn worker writes its samples there and /metrics adds them all up
+"""
+import os
+import time
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# every process that loads the app, the flask commands too, writes its
+# samples there as soon as the first live gauge is made
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time spent answering requests",
+    ["endpoint"],
+)
+REQUESTS = Counter(
+    "http_requests",
+    "Requests answered",
+    ["endpoint", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests being answered",
+    multiprocess_mode="livesum",
+)
+DB_QUERIES = Histogram(
+    "db_queries_per_request",
+    "SQL statements sent to the database per request",
+    ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, float("inf")),
+)
+DB_DURATION = Histogram(
+    "db_duration_seconds_per_request",
+    "Time spent in the database per request",
+    ["endpoint"],
+)
+
+
+def endpoint_name() -> str:
+    """Returns the label of the endpoint of the request
+
+    Resources are named after their class and method like WishlistResource.get,
+    plain Flask routes after their endpoint
+    """
+    if request.url_rule is None:
+        return "unmatched"
+    view = current_app.view_functions.get(request.endpoint)
+    view_class = getattr(view, "view_class", None)
+    if view_class is None:
+        return request.endpoint
+    return f"{view_class.__name__}.{request.method.lower()}"
+
+
+def render() -> tuple:
+    """Returns the metrics of every worker in the Prometheus text format"""
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class Metrics:
+    """Records the metrics of every request the app answers"""
+
+    def init_app(self, app, engine):
+        """Registers the request hooks on the app and the query hooks on the engine"""
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        app.teardown_request(self.teardown_request)
+        event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+
+    @staticmethod
+    def start_request():
+        """Starts the clocks of a request"""
+        REQUESTS_IN_FLIGHT.inc()
+        g.metrics_start = time.perf_counter()
+        g.db_queries = 0
+        g.db_seconds = 0.0
+
+    @staticmethod
+    def finish_request(response):
+        """Records the latency, status and database use of a request"""
+        if "metrics_start" in g:
+            endpoint = endpoint_name()
+            REQUEST_DURATION.labels(endpoint).observe(
+                time.perf_counter() - g.metrics_start
+            )
+            REQUESTS.labels(endpoint, response.status_code).inc()
+            DB_QUERIES.labels(endpoint).observe(g.db_queries)
+            DB_DURATION.labels(endpoint).observe(g.db_seconds)
+        return response
+
+    @staticmethod
+    def teardown_request(_error):
+        """Ends a request, also when it failed"""
+        if g.pop("metrics_start", None) is not None:
+            REQUESTS_IN_FLIGHT.dec()
+
+    @staticmethod
+    def before_cursor_execute(conn, _cursor, *_args):
+        """Starts the clock of a statement"""
+        conn.info["query_start"] = time.perf_counter()
+
+    @staticmethod
+    def after_cursor_execute(conn, _cursor, *_args):
+        """Adds a statement to the database use of the request"""
+        if has_request_context() and "db_queries" in g:
+            g.db_queries += 1
+            g.db_seconds += time.perf_counter() - conn.info["query_start"]
+
+
+# The metrics object is initialized later in create_app()
+metrics = Metrics()
@@ -0,0 +1,247 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Schema Migrations
+
+This module contains the numbered migrations of the database schema and
+the runner that applies the ones a database is missing. Applied versions
+are recorded in the schema_migrations table, and a Postgres advisory lock
+lets only one process migrate at a time.
+
+Migrations are never edited once released, a change to the schema is a
+new migration at the end of the list. Statements use IF NOT EXISTS so that
+databases created by create_all() before migrations existed can upgrade,
+and indexes are built by create_index() so that an index a failed build
+left behind is built again.
+"""
+import logging
+from typing import NamedTuple
+from sqlalchemy import text
+
+logger = logging.getLogger("flask.app")
+
+# Key of the advisory lock held while migrating
+LOCK_KEY = 7_242_001
+
+
+class Migration(NamedTuple):
+    """A numbered change to the schema
+
+    A statement is SQL text or a function that takes the connection. A
+    transactional migration runs all of its statements in one transaction.
+    Statements that Postgres refuses to run inside a transaction, like
+    CREATE INDEX CONCURRENTLY, need transactional=False and must be safe to
+    run again when the migration fails halfway
+    """
+
+    version: int
+    description: str
+    statements: tuple
+    transactional: bool = True
+
+
+def create_index(name, definition, unique=False):
+    """Returns a statement that builds an index with CREATE INDEX CONCURRENTLY
+
+    A concurrent build that fails leaves an INVALID index behind, which
+    IF NOT EXISTS would take for a finished one. Such an index is dropped
+    and built again, so running the statement again always ends with a
+    valid index or an error
+
+    Args:
+        name (str): the name of the index
+        definition (str): the table and columns, like "item (status)"
+        unique (bool): whether the index rejects duplicate values
+    """
+
+    def statement(conn):
+        valid = conn.execute(
+            text(
+                "SELECT indisvalid FROM pg_index "
+                "WHERE indexrelid = to_regclass(:name)"
+            ),
+            {"name": name},
+        ).scalar()
+        if valid is False:
+            logger.warning("Rebuilding the invalid index %s", name)
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        conn.execute(
+            text(f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+        )
+
+    return statement
+
+
+MIGRATIONS = [
+    Migration(
+        1,
+        "Create the wishlist and item tables",
+        (
+            """
+            DO $$ BEGIN
+                CREATE TYPE itemstatus AS ENUM (
+                    'PENDING', 'PURCHASED', 'OUT_OF_STOCK', 'EXPIRED', 'FAVORITE'
+                );
+            EXCEPTION WHEN duplicate_object THEN NULL;
+            END $$
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS wishlist (
+                id SERIAL PRIMARY KEY,
+                name VARCHAR(64) NOT NULL,
+                userid VARCHAR(16) NOT NULL,
+                date_created DATE NOT NULL
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS item (
+                id SERIAL PRIMARY KEY,
+                wishlist_id INTEGER NOT NULL
+                    REFERENCES wishlist (id) ON DELETE CASCADE,
+                name VARCHAR(64),
+                description VARCHAR(64),
+                price NUMERIC(10, 2) NOT NULL,
+                status itemstatus DEFAULT 'PENDING'
+            )
+            """,
+        ),
+    ),
+    Migration(
+        2,
+        "Index the wishlist lookups and the item names of a wishlist",
+        (
+            create_index("ix_wishlist_name", "wishlist (name)"),
+            create_index("ix_wishlist_userid", "wishlist (userid)"),
+            create_index("ix_wishlist_date_created", "wishlist (date_created)"),
+            # item names used to repeat within a wishlist, every copy after
+            # the first is renamed to "<name> #<id>" so that the unique index
+            # can be built
+            """
+            UPDATE item
+            SET name = left(item.name, 62 - length(item.id::text)) || ' #' || item.id
+            FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY wishlist_id, name ORDER BY id
+                ) AS copy
+                FROM item
+                WHERE name IS NOT NULL
+            ) AS copies
+            WHERE item.id = copies.id AND copies.copy > 1
+            """,
+            create_index(
+                "ix_item_wishlist_id_name", "item (wishlist_id, name)", unique=True
+            ),
+        ),
+        transactional=False,
+    ),
+    Migration(
+        3,
+        "Track the update time and version of every row",
+        (
+            "ALTER TABLE wishlist ADD COLUMN IF NOT EXISTS updated_at "
+            "TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()",
+            "ALTER TABLE wishlist ADD COLUMN IF NOT EXISTS version_id "
+            "INTEGER NOT NULL DEFAULT 1",
+            "ALTER TABLE item ADD COLUMN IF NOT EXISTS updated_at "
+            "TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()",
+            "ALTER TABLE item ADD COLUMN IF NOT EXISTS version_id "
+            "INTEGER NOT NULL DEFAULT 1",
+        ),
+    ),
+    Migration(
+        4,
+        "Index the items by status and update time for bulk transitions",
+        (create_index("ix_item_status_updated_at", "item (status, updated_at)"),),
+        transactional=False,
+    ),
+]
+
+
+def applied_versions(conn) -> list:
+    """Returns the versions of the migrations applied to the database"""
+    conn.execute(
+        text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, "
+            "description TEXT NOT NULL, "
+            "applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now())"
+        )
+    )
+    rows = conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))
+    return list(rows.scalars())
+
+
+def apply(conn, migration) -> None:
+    """Runs the statements of a migration and records its version"""
+    logger.info("Applying migration %d: %s", migration.version, migration.description)
+    if migration.transactional:
+        run_statements(conn, migration)
+        return
+    conn.execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        run_statements(conn, migration)
+    finally:
+        conn.rollback()
+        conn.execution_options(isolation_level=conn.default_isolation_level)
+
+
+def run_statements(conn, migration) -> None:
+    """Executes the statements of a migration and records it as applied"""
+    for statement in migration.statements:
+        if callable(statement):
+            statement(conn)
+        else:
+            conn.execute(text(statement))
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, description) VALUES (:v, :d)"),
+        {"v": migration.version, "d": migration.description},
+    )
+    conn.commit()
+
+
+def upgrade(engine, target=None, migrations=None) -> list:
+    """Applies the missing migrations up to the target version, None for all
+
+    Args:
+        engine (Engine): the engine of the database to migrate
+        target (int): the last version to apply
+        migrations (list): the migrations to choose from, MIGRATIONS by default
+
+    Returns:
+        the migrations that were applied, in order
+    """
+    migrations = MIGRATIONS if migrations is None else migrations
+    applied = []
+    with engine.connect() as conn:
+        # a session lock outlives the transactions of the migrations
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": LOCK_KEY})
+        try:
+            done = set(applied_versions(conn))
+            conn.commit()
+            for migration in sorted(migrations, key=lambda m: m.version):
+                if migration.version in done:
+                    continue
+                if target is not None and migration.version > target:
+                    break
+                apply(conn, migration)
+                applied.append(migration)
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+            conn.commit()
+    return applied
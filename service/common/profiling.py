@@ -0,0 +1,101 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+SQL Profiling
+
+This module contains an opt-in profiler that records every SQL statement
+of a request, reports the database time in a Server-Timing header and logs
+the statements of slow requests
+"""
+import logging
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger("flask.app")
+
+# Longest representation of the parameters of a statement that is logged
+PARAMETERS_MAX = 200
+
+
+class SqlProfiler:
+    """Profiles the SQL statements of every request when SQL_PROFILING is on"""
+
+    def __init__(self):
+        self.slow_request_ms = 500
+
+    def init_app(self, app, engine):
+        """Registers the request hooks on the app and the query hooks on the engine"""
+        if not app.config["SQL_PROFILING"]:
+            return
+        self.slow_request_ms = app.config["SLOW_REQUEST_MS"]
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+        logger.info("SQL profiling on, slow requests over %d ms", self.slow_request_ms)
+
+    @staticmethod
+    def start_request():
+        """Starts the profile of a request"""
+        g.sql_profile_start = time.perf_counter()
+        g.sql_profile = []
+
+    def finish_request(self, response):
+        """Adds the Server-Timing header and logs the request if it was slow"""
+        if "sql_profile" not in g:
+            return response
+        total_ms = (time.perf_counter() - g.sql_profile_start) * 1000
+        db_ms = sum(ms for _, _, ms in g.sql_profile)
+        count = len(g.sql_profile)
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={db_ms:.1f};desc="{count} statements", app;dur={total_ms:.1f}',
+        )
+        if total_ms >= self.slow_request_ms:
+            lines = [
+                f"  {ms:.1f} ms {statement} {parameters}"
+                for statement, parameters, ms in g.sql_profile
+            ]
+            logger.warning(
+                "Slow request %s %s took %.1f ms with %d statements in %.1f ms\n%s",
+                request.method,
+                request.full_path,
+                total_ms,
+                count,
+                db_ms,
+                "\n".join(lines),
+            )
+        return response
+
+    @staticmethod
+    def before_cursor_execute(conn, _cursor, *_args):
+        """Starts the clock of a statement"""
+        conn.info["sql_profile_start"] = time.perf_counter()
+
+    @staticmethod
+    def after_cursor_execute(
+        conn, _cursor, statement, parameters, *_args
+    ):  # pylint: disable=too-many-arguments
+        """Adds a statement to the profile of the request"""
+        if has_request_context() and "sql_profile" in g:
+            ms = (time.perf_counter() - conn.info["sql_profile_start"]) * 1000
+            g.sql_profile.append((statement, repr(parameters)[:PARAMETERS_MAX], ms))
+
+
+# The profiler is initialized later in create_app()
+profiler = SqlProfiler()
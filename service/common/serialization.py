@@ -0,0 +1,44 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Serialization
+
+This module renders documents as JSON with orjson. The dictionaries built by
+serialize() already have the shape of the Swagger models, so the read routes
+encode them directly instead of marshalling them a second time field by field
+"""
+import orjson
+from flask import Response
+from service.common import status
+
+
+def dumps(document) -> bytes:
+    """Returns a document encoded as JSON"""
+    return orjson.dumps(document)
+
+
+def json_response(document, code=status.HTTP_200_OK, headers=None) -> Response:
+    """Returns a response with a document encoded as JSON
+
+    Args:
+        document (dict or list): the serialized resource or resources
+        code (int): the status code of the response
+        headers (dict): the headers of the response
+    """
+    return Response(
+        dumps(document), status=code, headers=headers, mimetype="application/json"
+    )
@@ -13,7 +13,78 @@ DATABASE_URI = os.getenv(
 # Configure SQLAlchemy
 SQLALCHEMY_DATABASE_URI = DATABASE_URI
 SQLALCHEMY_TRACK_MODIFICATIONS = False
-# SQLALCHEMY_POOL_SIZE = 2
+
+# Connection pool of each worker, every worker can hold up to
+# DB_POOL_SIZE + DB_MAX_OVERFLOW connections of the Postgres max_connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+# Seconds a request waits for a connection before failing
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Seconds after which a connection is replaced, -1 to keep connections forever
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Test connections with a ping when they are checked out of the pool
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("true", "1")
+# Milliseconds Postgres lets a statement run before canceling it, 0 for no limit
+DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", "30000"))
+
+SQLALCHEMY_ENGINE_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+    "connect_args": {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"},
+}
+
+# Postgres may still be starting when the service boots, the first
+# connection is tried RETRY_COUNT times, waiting RETRY_DELAY seconds after
+# the first failure and twice as long after each next one up to RETRY_MAX_DELAY
+RETRY_COUNT = int(os.getenv("RETRY_COUNT", "5"))
+RETRY_DELAY = float(os.getenv("RETRY_DELAY", "1"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "30"))
+
+# Readiness probes cancel their SELECT 1 after HEALTH_CHECK_TIMEOUT_MS
+# milliseconds and reuse its result for HEALTH_CHECK_TTL seconds
+HEALTH_CHECK_TIMEOUT_MS = int(os.getenv("HEALTH_CHECK_TIMEOUT_MS", "1000"))
+HEALTH_CHECK_TTL = float(os.getenv("HEALTH_CHECK_TTL", "2"))
+
+# Record the SQL statements of every request, report their time in a
+# Server-Timing header and log the statements of requests slower than
+# SLOW_REQUEST_MS milliseconds
+SQL_PROFILING = os.getenv("SQL_PROFILING", "false").lower() in ("true", "1")
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "500"))
+
+# Largest page a client may request from the list endpoints
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "1000"))
+
+# Largest number of records a client may send to a batch endpoint
+BATCH_SIZE_MAX = int(os.getenv("BATCH_SIZE_MAX", "10000"))
+
+# Largest request body in bytes, a bigger upload is answered with 413
+# before it is read, since a JSON array can only be counted once parsed
+MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", str(32 * 1024 * 1024)))
+
+# Number of wishlists fetched per round trip when streaming an export
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+
+# Number of items POST /items:transition changes per transaction
+TRANSITION_BATCH_SIZE = int(os.getenv("TRANSITION_BATCH_SIZE", "1000"))
+
+# Items that stayed PENDING without an update for EXPIRY_AFTER_DAYS are
+# expired EXPIRY_BATCH_SIZE at a time, pausing EXPIRY_BATCH_DELAY seconds
+# between batches. With EXPIRY_INTERVAL seconds the gunicorn workers sweep
+# on their own, 0 leaves it to flask items-expire
+EXPIRY_AFTER_DAYS = float(os.getenv("EXPIRY_AFTER_DAYS", "30"))
+EXPIRY_BATCH_SIZE = int(os.getenv("EXPIRY_BATCH_SIZE", "1000"))
+EXPIRY_BATCH_DELAY = float(os.getenv("EXPIRY_BATCH_DELAY", "0.1"))
+EXPIRY_INTERVAL = int(os.getenv("EXPIRY_INTERVAL", "0"))
+
+# Cache of serialized wishlists: "memory" keeps an LRU cache in each worker,
+# "redis" shares one cache between all workers, "none" turns caching off
+REDIS_URI = os.getenv("REDIS_URI", "redis://localhost:6379/0")
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "30"))
+CACHE_MAXSIZE = int(os.getenv("CACHE_MAXSIZE", "1024"))
 
 # Secret for session management
 SECRET_KEY = os.getenv("SECRET_KEY", "sup3r-s3cr3t")
@@ -10,11 +10,46 @@ import logging
 from datetime import date
 from enum import Enum
 from flask_sqlalchemy import SQLAlchemy
+from retry.api import retry_call
+from sqlalchemy import func, insert, select, text, tuple_, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm.exc import StaleDataError
+from service.common.cache import cache
+from service.common.pool import MeteredQueuePool
 
 logger = logging.getLogger("flask.app")
 
 # Create the SQLAlchemy object to be initialized later in init_db()
-db = SQLAlchemy()
+# the pool records how long checkouts wait, see GET /internal/pool
+db = SQLAlchemy(engine_options={"poolclass": MeteredQueuePool})
+
+
+def connect_db(app) -> None:
+    """Waits until the database accepts connections
+
+    The first connection is retried with exponential backoff, so workers
+    survive a database that is still starting instead of exiting at once
+    """
+    retry_call(
+        ping_db,
+        exceptions=OperationalError,
+        tries=app.config["RETRY_COUNT"],
+        delay=app.config["RETRY_DELAY"],
+        max_delay=app.config["RETRY_MAX_DELAY"],
+        backoff=2,
+        logger=logger,
+    )
+
+
+def ping_db() -> None:
+    """Runs SELECT 1 to check that the database answers"""
+    with db.engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+
+# SQLSTATE PostgreSQL reports when a unique index rejects a row
+UNIQUE_VIOLATION = "23505"
 
 
 class ItemStatus(Enum):
@@ -33,6 +68,14 @@ class DataValidationError(Exception):
     """Used for an data validation errors when deserializing"""
 
 
+class DuplicateError(DataValidationError):
+    """Used when a change would break a unique constraint"""
+
+
+class StaleVersionError(Exception):
+    """Used when a record was changed by someone else since it was read"""
+
+
 ######################################################################
 #  P E R S I S T E N T   B A S E   M O D E L
 ######################################################################
@@ -50,6 +93,10 @@ class PersistentBase:
     def deserialize(self, data: dict) -> None:
         """Convert a dictionary into an object"""
 
+    @abstractmethod
+    def cache_keys(self) -> list:
+        """Returns the cache keys that a change to this object invalidates"""
+
     def create(self) -> None:
         """
         Creates a Wishlist to the database
@@ -59,11 +106,14 @@ class PersistentBase:
         self.id = None
         try:
             db.session.add(self)
+            db.session.flush()
+            keys = self.cache_keys()
             db.session.commit()
         except Exception as e:
             db.session.rollback()
             logger.error("Error creating record: %s", self)
             raise DataValidationError(e) from e
+        cache.delete(*keys)
 
     def update(self) -> None:
         """
@@ -72,16 +122,30 @@ class PersistentBase:
         logger.info("Updating %s", self)
         if not self.id:
             raise DataValidationError("Update called with empty ID field")
+        keys = self.cache_keys()
+        record = f"{type(self).__name__} with id '{self.id}'"
         try:
             db.session.commit()
+        except StaleDataError as e:
+            db.session.rollback()
+            logger.warning("Stale version of record: %s", record)
+            raise StaleVersionError(f"{record} was changed by another request") from e
+        except IntegrityError as e:
+            db.session.rollback()
+            logger.error("Error updating record: %s", record)
+            if getattr(e.orig, "sqlstate", None) == UNIQUE_VIOLATION:
+                raise DuplicateError(e) from e
+            raise DataValidationError(e) from e
         except Exception as e:
             db.session.rollback()
             logger.error("Error updating record: %s", self)
             raise DataValidationError(e) from e
+        cache.delete(*keys)
 
     def delete(self) -> None:
         """Removes a Wishlist from the data store"""
         logger.info("Deleting %s", self)
+        keys = self.cache_keys()
         try:
             db.session.delete(self)
             db.session.commit()
@@ -89,6 +153,7 @@ class PersistentBase:
             db.session.rollback()
             logger.error("Error deleting record: %s", self)
             raise DataValidationError(e) from e
+        cache.delete(*keys)
 
     @classmethod
     def all(cls):
@@ -104,6 +169,51 @@ class PersistentBase:
         # pylint: disable=no-member
         return cls.query.session.get(cls, by_id)
 
+    @classmethod
+    def keyset_page(
+        cls, query, after_id=None, limit=None, sort_by=None, descending=False
+    ):  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        """Returns one page of records and the cursor for the next page
+
+        Seeks past ``after_id`` on the sort key instead of using OFFSET, so
+        every page costs the same no matter how deep into the table it is.
+        Records are ordered by ``sort_by`` and then by ID, so the cursor is
+        always the ID of the last record on the previous page.
+
+        Args:
+            query (Query): the query to page through
+            after_id (int): only return records that sort after this ID
+            limit (int): the maximum number of records to return, None for all
+            sort_by (ColumnElement): column to sort on before the ID
+            descending (bool): sort from the largest to the smallest key
+
+        Returns:
+            a tuple of the list of records and the ID to pass as ``after_id`` to
+            fetch the next page, or None when this is the last page
+        """
+        logger.info("Processing page of %s after id %s ...", limit, after_id)
+        key = [cls.id] if sort_by is None else [sort_by, cls.id]
+        query = query.order_by(*[col.desc() if descending else col for col in key])
+        if after_id is not None:
+            seek, cursor = cls.id, after_id
+            if sort_by is not None:
+                # the sort key of the cursor row is looked up in the same statement
+                seek = tuple_(*key)
+                cursor = (
+                    select(*key)
+                    .where(cls.id == after_id)
+                    .correlate(None)
+                    .scalar_subquery()
+                )
+            query = query.filter(seek < cursor if descending else seek > cursor)
+        if limit is None:
+            return query.all(), None
+        # fetch one extra row to find out whether there is a next page
+        records = query.limit(limit + 1).all()
+        if len(records) > limit:
+            return records[:limit], records[limit - 1].id
+        return records, None
+
 
 ######################################################################
 #  W I S H L I S T  M O D E L
@@ -115,14 +225,65 @@ class Wishlist(db.Model, PersistentBase):
 
     # Table Schema
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(64), nullable=False)
-    userid = db.Column(db.String(16), nullable=False)
-    date_created = db.Column(db.Date(), nullable=False, default=date.today())
-    items = db.relationship("Item", backref="wishlist", passive_deletes=True)
+    name = db.Column(db.String(64), nullable=False, index=True)
+    userid = db.Column(db.String(16), nullable=False, index=True)
+    date_created = db.Column(
+        db.Date(), nullable=False, default=date.today(), index=True
+    )
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+    # every UPDATE and DELETE checks and bumps the version, so a write based
+    # on a stale copy fails with StaleDataError instead of being lost
+    version_id = db.Column(db.Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version_id}
+    # selectin loads the items of every wishlist in a query with one extra
+    # SELECT ... WHERE wishlist_id IN (...) instead of one SELECT per wishlist
+    # with the items loaded the ORM deletes them itself, otherwise it leaves
+    # that to the ON DELETE CASCADE of the foreign key
+    items = db.relationship(
+        "Item",
+        backref="wishlist",
+        cascade="all, delete",
+        passive_deletes=True,
+        lazy="selectin",
+    )
 
     def __repr__(self):
         return f"<Wishlist {self.name} id=[{self.id}]>"
 
+    @staticmethod
+    def cache_key(wishlist_id) -> str:
+        """Returns the key of the cached serialized Wishlist with the given id"""
+        return f"wishlist:{wishlist_id}"
+
+    @staticmethod
+    def stats_key(wishlist_id) -> str:
+        """Returns the key of the cached statistics of the Wishlist with the given id"""
+        return f"wishlist:{wishlist_id}:stats"
+
+    def cache_keys(self) -> list:
+        """Returns the cache keys that a change to this Wishlist invalidates"""
+        return [Wishlist.cache_key(self.id), Wishlist.stats_key(self.id)]
+
+    def version(self) -> tuple:
+        """Returns a value that changes whenever this Wishlist or its Items change
+
+        It is the same value find_version() computes in the database, taken
+        from the loaded Wishlist and Items instead
+        """
+        updated = [item.updated_at for item in self.items]
+        return (
+            self.id,
+            self.version_id,
+            len(updated),
+            sum(item.version_id for item in self.items),
+            max(updated).isoformat() if updated else None,
+        )
+
     def serialize(self):
         """Converts an Wishlist into a dictionary"""
         wishlist = {
@@ -136,6 +297,14 @@ class Wishlist(db.Model, PersistentBase):
             wishlist["items"].append(item.serialize())
         return wishlist
 
+    def insert_values(self) -> dict:
+        """Returns the column values used to insert this Wishlist"""
+        return {
+            "name": self.name,
+            "userid": self.userid,
+            "date_created": self.date_created,
+        }
+
     def deserialize(self, data):
         """
         Populates an Wishlist from a dictionary
@@ -164,12 +333,209 @@ class Wishlist(db.Model, PersistentBase):
                 "Invalid Wishlist: body of request contained bad or no data "
                 + str(error)
             ) from error
+        except ValueError as error:
+            raise DataValidationError("Invalid Wishlist: " + str(error)) from error
 
         return self
 
     ######################################################################
     #  C L A S S  M E T H O D S
     ######################################################################
+    @classmethod
+    def create_many(cls, wishlists) -> None:
+        """
+        Creates many Wishlists and their Items in a single transaction
+
+        The Wishlists are inserted with one multi-row INSERT ... RETURNING that
+        hands back their ids, and then all of their Items with another one
+
+        Args:
+            wishlists (list): the Wishlists to create, their ids are set in place
+        """
+        logger.info("Creating %d wishlists", len(wishlists))
+        if not wishlists:
+            return
+        try:
+            rows = db.session.execute(
+                insert(Wishlist).returning(Wishlist.id, sort_by_parameter_order=True),
+                [wishlist.insert_values() for wishlist in wishlists],
+            ).all()
+            items = []
+            for wishlist, row in zip(wishlists, rows):
+                wishlist.id = row.id
+                for item in wishlist.items:
+                    item.wishlist_id = wishlist.id
+                    items.append(item)
+            if items:
+                rows = db.session.execute(
+                    insert(Item).returning(Item.id, sort_by_parameter_order=True),
+                    [item.insert_values() for item in items],
+                ).all()
+                for item, row in zip(items, rows):
+                    item.id = row.id
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Error creating %d records", len(wishlists))
+            raise DataValidationError(e) from e
+
+    @classmethod
+    def from_document(cls, document):
+        """Creates a new Wishlist with its Items from an imported document
+
+        Unlike deserialize() the Items do not need a wishlist_id, since the
+        Wishlist they belong to has not been created yet
+
+        Args:
+            document (dict): a serialized Wishlist with an optional list of Items
+        """
+        if not isinstance(document, dict):
+            raise DataValidationError("Invalid Wishlist: expected a JSON object")
+        items = document.setdefault("items", [])
+        if not isinstance(items, list):
+            raise DataValidationError("Invalid Wishlist: items must be a list")
+        for item in items:
+            if isinstance(item, dict):
+                item.setdefault("wishlist_id", None)
+        return cls().deserialize(document)
+
+    @classmethod
+    def stream(cls, batch_size=1000):
+        """Yields every Wishlist with its Items in the order of their ids
+
+        Rows are fetched from a server-side cursor ``batch_size`` at a time,
+        together with the Items of that batch, so memory use does not grow
+        with the size of the table
+
+        Args:
+            batch_size (int): the number of Wishlists to load per round trip
+        """
+        logger.info("Processing stream of all wishlists ...")
+        statement = select(cls).order_by(cls.id).execution_options(yield_per=batch_size)
+        yield from db.session.scalars(statement)
+
+    @classmethod
+    def find_version(cls, by_id):
+        """Returns the version() of a Wishlist without loading it, None if missing
+
+        The version is read with one aggregate query over the version of the
+        Wishlist and the versions and update times of its Items. Adding or
+        removing an Item changes the count and every write of an Item bumps its
+        version_id, so the sum changes even when updated_at, which is the start
+        of the writing transaction, does not
+        """
+        logger.info("Processing version query for id %s ...", by_id)
+        row = (
+            db.session.query(
+                cls.version_id,
+                func.count(Item.id),
+                func.coalesce(func.sum(Item.version_id), 0),
+                func.max(Item.updated_at),
+            )
+            .outerjoin(Item, Item.wishlist_id == cls.id)
+            .filter(cls.id == by_id)
+            .group_by(cls.id)
+            .first()
+        )
+        if row is None:
+            return None
+        version_id, count, item_versions, last_item_update = row
+        return (
+            by_id,
+            version_id,
+            count,
+            int(item_versions),
+            last_item_update.isoformat() if last_item_update else None,
+        )
+
+    @classmethod
+    def with_totals(cls, query):
+        """Returns the rows of a Wishlist query with the totals of their Items
+
+        The columns of the Wishlists are read with the count and total price of
+        their Items in one GROUP BY query, no Item is loaded. The rows keep the
+        filters of the query and can be paged with keyset_page()
+        """
+        logger.info("Processing totals query ...")
+        return (
+            query.with_entities(
+                cls.id,
+                cls.name,
+                cls.userid,
+                cls.date_created,
+                func.count(Item.id).label("item_count"),
+                func.coalesce(func.sum(Item.price), 0).label("total_price"),
+            )
+            .outerjoin(Item, Item.wishlist_id == cls.id)
+            .group_by(cls.id)
+        )
+
+    @staticmethod
+    def serialize_totals(row) -> dict:
+        """Converts a row of with_totals() into a dictionary"""
+        return {
+            "id": row.id,
+            "name": row.name,
+            "userid": row.userid,
+            "date_created": row.date_created.isoformat(),
+            "item_count": row.item_count,
+            "total_price": float(row.total_price),
+        }
+
+    @classmethod
+    def find_stats(cls, wishlist_id=None, userid=None):
+        """Returns the statistics of the Items of a Wishlist or of a user
+
+        The count and total price of the Items of every ItemStatus are read
+        with one aggregate query, using a filtered count and sum per status
+
+        Args:
+            wishlist_id (int): the id of the Wishlist
+            userid (string): the user whose Wishlists are added up instead
+
+        Returns:
+            the statistics, or None when no Wishlist matches
+        """
+        logger.info("Processing stats query for %s ...", wishlist_id or userid)
+        columns = [func.count(cls.id.distinct()).label("wishlist_count")]
+        for item_status in ItemStatus:
+            matches = Item.status == item_status
+            columns.append(func.count(Item.id).filter(matches))
+            columns.append(func.coalesce(func.sum(Item.price).filter(matches), 0))
+        query = (
+            db.session.query(*columns)
+            .select_from(cls)
+            .outerjoin(Item, Item.wishlist_id == cls.id)
+        )
+        if wishlist_id is not None:
+            query = query.filter(cls.id == wishlist_id)
+        else:
+            query = query.filter(cls.userid == userid)
+        wishlist_count, *totals = query.one()
+        if wishlist_count == 0:
+            return None
+        statuses = {
+            item_status.value: {"count": count, "total_price": float(price)}
+            for item_status, count, price in zip(ItemStatus, totals[::2], totals[1::2])
+        }
+        return {
+            "wishlist_count": wishlist_count,
+            "item_count": sum(totals[::2]),
+            "total_price": float(sum(totals[1::2])),
+            "purchased_value": statuses[ItemStatus.PURCHASED.value]["total_price"],
+            "pending_value": statuses[ItemStatus.PENDING.value]["total_price"],
+            "statuses": statuses,
+        }
+
+    @classmethod
+    def exists(cls, by_id) -> bool:
+        """Returns True if a Wishlist with the given ID exists
+
+        Unlike find() this does not load the Wishlist or its items
+        """
+        logger.info("Processing exists query for id %s ...", by_id)
+        return db.session.query(cls.id).filter(cls.id == by_id).first() is not None
+
     @classmethod
     def find_by_name(cls, name):
         """Returns all Wishlists with the given name
@@ -220,6 +586,14 @@ class Item(db.Model, PersistentBase):
     """
 
     # Table Schema
+    # item names are unique within a wishlist, the index also serves
+    # every lookup of the items of a wishlist
+    # and items are expired by their status and the time they were last updated
+    __table_args__ = (
+        db.Index("ix_item_wishlist_id_name", "wishlist_id", "name", unique=True),
+        db.Index("ix_item_status_updated_at", "status", "updated_at"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     wishlist_id = db.Column(
         db.Integer, db.ForeignKey("wishlist.id", ondelete="CASCADE"), nullable=False
@@ -228,6 +602,14 @@ class Item(db.Model, PersistentBase):
     description = db.Column(db.String(64))
     price = db.Column(db.Numeric(precision=10, scale=2), nullable=False)
     status = db.Column(db.Enum(ItemStatus), nullable=True, server_default="PENDING")
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+    version_id = db.Column(db.Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version_id}
 
     def __repr__(self):
         return f"<Item {self.name} id=[{self.id}] wishlist[{self.wishlist_id}]>"
@@ -235,6 +617,224 @@ class Item(db.Model, PersistentBase):
     def __str__(self):
         return f"{self.id} - {self.name}"
 
+    def cache_keys(self) -> list:
+        """Returns the cache keys that a change to this Item invalidates"""
+        return Item.wishlist_cache_keys(self.wishlist_id)
+
+    @staticmethod
+    def wishlist_cache_keys(wishlist_id) -> list:
+        """Returns the cache keys that a change to an Item of a Wishlist invalidates"""
+        # the Item is part of the serialized Wishlist it belongs to
+        return [Wishlist.cache_key(wishlist_id), Wishlist.stats_key(wishlist_id)]
+
+    @staticmethod
+    def invalidate(wishlist_ids) -> None:
+        """Removes the cached copies that changes to Items of Wishlists invalidate"""
+        cache.delete(
+            *{key for i in wishlist_ids for key in Item.wishlist_cache_keys(i)}
+        )
+
+    def version(self) -> tuple:
+        """Returns a value that changes whenever this Item changes"""
+        return (self.id, self.version_id)
+
+    def create_unique(self) -> bool:
+        """
+        Creates an Item unless its Wishlist already has an Item with that name
+
+        The check and the insert are a single INSERT ... ON CONFLICT DO NOTHING
+        on the unique (wishlist_id, name) index, so it holds under concurrency
+
+        Returns:
+            True if the Item was created, False if the name is already taken
+        """
+        logger.info("Creating %s", self)
+        statement = (
+            postgresql.insert(Item)
+            .values(self.insert_values())
+            .on_conflict_do_nothing(index_elements=["wishlist_id", "name"])
+            .returning(Item.id)
+        )
+        try:
+            self.id = db.session.execute(statement).scalar()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Error creating record: %s", self)
+            raise DataValidationError(e) from e
+        if self.id is not None:
+            cache.delete(*self.cache_keys())
+        return self.id is not None
+
+    @classmethod
+    def create_many(cls, items) -> list:
+        """
+        Creates many Items with multi-row inserts in a single transaction
+
+        Like create_unique() an Item is skipped when its Wishlist already has
+        an Item with that name, including an earlier Item of the same batch
+
+        Args:
+            items (list): the Items to create
+
+        Returns:
+            True for every Item that was created and False for every Item that
+            was skipped, in the order of ``items``
+        """
+        logger.info("Creating %d items", len(items))
+        if not items:
+            return []
+        statement = (
+            postgresql.insert(Item)
+            .on_conflict_do_nothing(index_elements=["wishlist_id", "name"])
+            .returning(Item.id)
+        )
+        try:
+            # the ids are drawn from the sequence first, so the returned ids
+            # tell which of the Items were inserted without matching names
+            ids = db.session.scalars(
+                select(
+                    func.nextval(func.pg_get_serial_sequence("item", "id"))
+                ).select_from(func.generate_series(1, len(items)))
+            ).all()
+            # a list of parameters is sent as pages of multi-row VALUES and
+            # only the first Item with a name in the batch is inserted
+            created = set(
+                db.session.scalars(
+                    statement,
+                    [
+                        {**item.insert_values(), "id": item_id}
+                        for item, item_id in zip(items, ids)
+                    ],
+                )
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Error creating %d records", len(items))
+            raise DataValidationError(e) from e
+
+        for item, item_id in zip(items, ids):
+            item.id = item_id if item_id in created else None
+        Item.invalidate({item.wishlist_id for item in items})
+        return [item.id is not None for item in items]
+
+    @classmethod
+    def transition(
+        cls,
+        new_status,
+        ids=None,
+        status=None,
+        older_than=None,
+        wishlist_id=None,
+        batch_size=1000,
+        max_ids=None,
+    ):  # pylint: disable=too-many-arguments, too-many-positional-arguments, too-many-locals
+        """
+        Sets the status of every Item that matches the filters, batch by batch
+
+        The Items are changed without loading them by one UPDATE ... RETURNING
+        per batch of ``batch_size`` Items, which are chosen in the order of
+        their ids after the last Item of the previous batch. Every batch is
+        committed on its own so that no transaction holds many row locks, a
+        failure leaves the earlier batches changed. Their version and update
+        time change like in update(), and Items that already have the new
+        status are left alone
+
+        Args:
+            new_status (ItemStatus): the status to set
+            ids (list): only the Items with these ids
+            status (ItemStatus): only Items with this status
+            older_than (timedelta): only Items not updated for this long
+            wishlist_id (int): only the Items of this Wishlist
+            batch_size (int): the number of Items changed per transaction
+            max_ids (int): the number of ids to return, None for all
+
+        Returns:
+            a tuple of the number of changed Items and the ids of the first
+            ``max_ids`` of them
+        """
+        logger.info("Processing transition of items to %s ...", new_status.name)
+        conditions = [cls.status.is_distinct_from(new_status)]
+        if ids is not None:
+            conditions.append(cls.id.in_(ids))
+        if status is not None:
+            conditions.append(cls.status == status)
+        if older_than is not None:
+            conditions.append(cls.updated_at < func.now() - older_than)
+        if wishlist_id is not None:
+            conditions.append(cls.wishlist_id == wishlist_id)
+        count, changed, after = 0, [], None
+        while True:
+            batch = select(cls.id).where(*conditions).order_by(cls.id).limit(batch_size)
+            if after is not None:
+                batch = batch.where(cls.id > after)
+            # the conditions are checked again for rows changed since the SELECT
+            statement = (
+                update(cls)
+                .where(cls.id.in_(batch.scalar_subquery()), *conditions)
+                .values(
+                    status=new_status,
+                    updated_at=func.now(),
+                    version_id=cls.version_id + 1,
+                )
+                .returning(cls.id, cls.wishlist_id)
+                .execution_options(synchronize_session=False)
+            )
+            try:
+                rows = db.session.execute(statement).all()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(
+                    "Error changing the status of items to %s", new_status.name
+                )
+                raise DataValidationError(e) from e
+            Item.invalidate({row.wishlist_id for row in rows})
+            count += len(rows)
+            room = len(rows) if max_ids is None else max_ids - len(changed)
+            # RETURNING gives the rows in no particular order
+            changed.extend(sorted(row.id for row in rows)[:room])
+            # a list of ids no longer than a batch is done in one
+            if len(rows) < batch_size or (ids is not None and len(ids) <= batch_size):
+                return count, changed
+            after = max(row.id for row in rows)
+
+    @classmethod
+    def find_stale(cls, status, older_than, after=None, limit=1000) -> list:
+        """Returns the next Items that kept a status without an update for too long
+
+        Items are read by the index on status and update time in the order of
+        their update time and id, only the id and update time are loaded
+
+        Args:
+            status (ItemStatus): the status of the Items
+            older_than (timedelta): how long the Items were not updated
+            after (tuple): the update time and id of the last Item of the
+                previous page, None for the first page
+            limit (int): the maximum number of Items to return
+
+        Returns:
+            a list of rows with the id and updated_at of the Items
+        """
+        logger.info("Processing stale %s items after %s ...", status.name, after)
+        query = db.session.query(cls.id, cls.updated_at).filter(
+            cls.status == status, cls.updated_at < func.now() - older_than
+        )
+        if after is not None:
+            query = query.filter(tuple_(cls.updated_at, cls.id) > tuple_(*after))
+        return query.order_by(cls.updated_at, cls.id).limit(limit).all()
+
+    def insert_values(self) -> dict:
+        """Returns the column values used to insert this Item"""
+        return {
+            "wishlist_id": self.wishlist_id,
+            "name": self.name,
+            "description": self.description,
+            "price": self.price,
+            "status": self.status,
+        }
+
     def serialize(self) -> dict:
         """Converts an Item into a dictionary"""
         return {
@@ -256,6 +856,8 @@ class Item(db.Model, PersistentBase):
         try:
             self.wishlist_id = data["wishlist_id"]
             self.name = data["name"]
+            if not isinstance(self.name, str):
+                raise DataValidationError("Invalid Item: 'name' must be a string.")
             self.description = data["description"]
 
             # Verify and transform the type of price
@@ -274,3 +876,59 @@ class Item(db.Model, PersistentBase):
             ) from error
 
         return self
+
+    ######################################################################
+    #  C L A S S  M E T H O D S
+    ######################################################################
+    @classmethod
+    def find_in_wishlist(cls, wishlist_id, item_id):
+        """Returns whether a Wishlist exists and its Item with the given ID
+
+        The Wishlist is outer joined to the Item in one query, so telling a
+        missing Wishlist from a missing Item costs a single round trip
+
+        Args:
+            wishlist_id (int): the id of the Wishlist the Item belongs to
+            item_id (int): the id of the Item
+
+        Returns:
+            a tuple of True when the Wishlist exists and the Item, or None
+            when the Wishlist has no Item with that ID
+        """
+        logger.info(
+            "Processing lookup for item %s in wishlist %s ...", item_id, wishlist_id
+        )
+        row = (
+            db.session.query(Wishlist.id, cls)
+            .outerjoin(cls, (cls.wishlist_id == Wishlist.id) & (cls.id == item_id))
+            .filter(Wishlist.id == wishlist_id)
+            .first()
+        )
+        if row is None:
+            return False, None
+        return True, row[1]
+
+    @classmethod
+    def find_by_filters(
+        cls, wishlist_id, status=None, min_price=None, max_price=None, name=None
+    ):  # pylint: disable=too-many-arguments, too-many-positional-arguments
+        """Returns a query for the Items of a Wishlist that match the filters
+
+        Args:
+            wishlist_id (int): the id of the Wishlist the Items belong to
+            status (ItemStatus): only Items with this status
+            min_price (float): only Items that cost at least this much
+            max_price (float): only Items that cost at most this much
+            name (string): only Items whose name starts with this prefix
+        """
+        logger.info("Processing filtered item query for wishlist %s ...", wishlist_id)
+        query = cls.query.filter(cls.wishlist_id == wishlist_id)
+        if status is not None:
+            query = query.filter(cls.status == status)
+        if min_price is not None:
+            query = query.filter(cls.price >= min_price)
+        if max_price is not None:
+            query = query.filter(cls.price <= max_price)
+        if name:
+            query = query.filter(cls.name.startswith(name, autoescape=True))
+        return query
@@ -14,6 +14,7 @@
 # limitations under the License.
 ######################################################################
 # cspell:ignore userid postalcode
+# pylint: disable=too-many-lines
 """
 YourResourceModel Service
 
@@ -21,11 +22,23 @@ This service implements a REST API that allows you to Create, Read, Update
 and Delete YourResourceModel
 """
 
-from flask import jsonify, request, url_for, abort
+import json
+import os
+from datetime import timedelta
+from urllib.parse import urlencode
+from flask import jsonify, request, url_for, abort, stream_with_context, Response
 from flask import current_app as app  # Import Flask application
-from flask_restx import fields, reqparse, Resource, Api
-from service.models import Item, Wishlist, ItemStatus
+from flask_restx import fields, inputs, reqparse, Resource, Api
+from sqlalchemy import func
+from werkzeug.http import generate_etag, quote_etag
+from service.models import db, Item, Wishlist, ItemStatus
+from service.models import DataValidationError, DuplicateError, StaleVersionError
 from service.common import status  # HTTP Status Codes
+from service.common.cache import cache
+from service.common.health import readiness
+from service.common.metrics import render as render_metrics
+from service.common.pool import pool_status
+from service.common.serialization import dumps, json_response
 
 ######################################################################
 # Configure Swagger before initializing it
@@ -103,6 +116,112 @@ item_model = api.inherit(
     },
 )
 
+item_result_model = api.model(
+    "ItemResult",
+    {
+        "index": fields.Integer(description="Position of the item in the batch"),
+        "status": fields.Integer(description="HTTP status of the item"),
+        "id": fields.Integer(description="The id of the created item"),
+        "message": fields.String(description="Why the item was not created"),
+    },
+)
+
+status_names = [item_status.name for item_status in ItemStatus]
+
+transition_model = api.model(
+    "StatusTransition",
+    {
+        "status": fields.String(
+            required=True, enum=status_names, description="The status to set"
+        ),
+        "ids": fields.List(fields.Integer, description="Only the items with these ids"),
+        "from_status": fields.String(
+            enum=status_names, description="Only the items with this status"
+        ),
+        "older_than_days": fields.Float(
+            description="Only the items that were not updated for this many days"
+        ),
+        "wishlist_id": fields.Integer(description="Only the items of this wishlist"),
+    },
+)
+
+transition_result_model = api.model(
+    "StatusTransitionResult",
+    {
+        "status": fields.String(description="The status that was set"),
+        "count": fields.Integer(description="The number of items that changed"),
+        "ids": fields.List(
+            fields.Integer,
+            description="The ids of the changed items, at most BATCH_SIZE_MAX",
+        ),
+        "truncated": fields.Boolean(
+            description="Whether more items changed than ids are listed"
+        ),
+    },
+)
+
+status_stats_model = api.model(
+    "StatusStats",
+    {
+        "count": fields.Integer(description="The number of items"),
+        "total_price": fields.Float(description="The sum of the prices of the items"),
+    },
+)
+
+stats_model = api.model(
+    "Stats",
+    {
+        "wishlist_count": fields.Integer(description="The number of wishlists"),
+        "item_count": fields.Integer(description="The number of items"),
+        "total_price": fields.Float(description="The sum of the prices of all items"),
+        "purchased_value": fields.Float(description="The price of purchased items"),
+        "pending_value": fields.Float(description="The price of pending items"),
+        "statuses": fields.Nested(
+            api.model(
+                "StatusesStats",
+                {
+                    item_status.value: fields.Nested(status_stats_model)
+                    for item_status in ItemStatus
+                },
+            ),
+            description="The count and total price of the items of every status",
+        ),
+    },
+)
+
+wishlist_stats_model = api.inherit(
+    "WishlistStats",
+    stats_model,
+    {"wishlist_id": fields.Integer(description="The id of the wishlist")},
+)
+
+user_stats_model = api.inherit(
+    "UserStats",
+    stats_model,
+    {"userid": fields.String(description="The user the wishlists belong to")},
+)
+
+# fields a wishlist listing can be narrowed to with ?fields=
+WISHLIST_FIELDS = (
+    "id",
+    "name",
+    "userid",
+    "date_created",
+    "items",
+    "item_count",
+    "total_price",
+)
+
+
+def wishlist_fields(value):
+    """Parses a comma separated list of wishlist fields"""
+    fields_list = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields_list if field not in WISHLIST_FIELDS]
+    if not fields_list or unknown:
+        raise ValueError(f"'{value}' is not a list of {', '.join(WISHLIST_FIELDS)}")
+    return fields_list
+
+
 # query string argumens
 wishlist_args = reqparse.RequestParser()
 wishlist_args.add_argument(
@@ -111,6 +230,134 @@ wishlist_args.add_argument(
 wishlist_args.add_argument(
     "userid", type=str, location="args", required=False, help="Find wishlist by userid"
 )
+wishlist_args.add_argument(
+    "limit",
+    type=inputs.int_range(1, app.config["PAGE_SIZE_MAX"]),
+    location="args",
+    required=False,
+    help="Maximum number of wishlists to return",
+)
+wishlist_args.add_argument(
+    "after_id",
+    type=int,
+    location="args",
+    required=False,
+    help="Return wishlists with an id greater than this cursor",
+)
+wishlist_args.add_argument(
+    "fields",
+    type=wishlist_fields,
+    location="args",
+    required=False,
+    help="Comma separated fields to return, like id,name,item_count",
+)
+wishlist_args.add_argument(
+    "include_items",
+    type=inputs.boolean,
+    location="args",
+    required=False,
+    default=True,
+    help="Set to false to return item_count and total_price instead of the items",
+)
+
+
+def item_status(value):
+    """Parses an ItemStatus from its value or its name"""
+    try:
+        return ItemStatus(value.lower())
+    except ValueError as error:
+        raise ValueError(f"'{value}' is not a valid item status") from error
+
+
+# columns the item listing can be sorted on, prefix with "-" to reverse
+ITEM_SORT_KEYS = {
+    "id": None,
+    "name": func.coalesce(Item.name, ""),
+    "price": Item.price,
+}
+
+item_args = reqparse.RequestParser()
+item_args.add_argument(
+    "status",
+    type=item_status,
+    location="args",
+    required=False,
+    help="Find items by status",
+)
+item_args.add_argument(
+    "min_price",
+    type=float,
+    location="args",
+    required=False,
+    help="Find items that cost at least this much",
+)
+item_args.add_argument(
+    "max_price",
+    type=float,
+    location="args",
+    required=False,
+    help="Find items that cost at most this much",
+)
+item_args.add_argument(
+    "name",
+    type=str,
+    location="args",
+    required=False,
+    help="Find items whose name starts with this prefix",
+)
+item_args.add_argument(
+    "sort",
+    type=str,
+    location="args",
+    required=False,
+    default="id",
+    choices=[prefix + key for key in ITEM_SORT_KEYS for prefix in ("", "-")],
+    help="Sort items by id, name or price, prefix with - for descending",
+)
+item_args.add_argument(
+    "limit",
+    type=inputs.int_range(1, app.config["PAGE_SIZE_MAX"]),
+    location="args",
+    required=False,
+    help="Maximum number of items to return",
+)
+item_args.add_argument(
+    "after_id",
+    type=int,
+    location="args",
+    required=False,
+    help="Return the items that sort after the item with this id",
+)
+
+
+######################################################################
+# Special Error Handlers
+######################################################################
+# Errors raised by a Resource go through Api.handle_error, which only hands
+# them to the error handlers of the app when Flask propagates exceptions,
+# as it does under TESTING. Everywhere else they need handlers of the Api
+@api.errorhandler(DataValidationError)
+def request_validation_error(error):
+    """Handles Value Errors from bad data"""
+    message = str(error)
+    app.logger.warning(message)
+    return {
+        "status": status.HTTP_400_BAD_REQUEST,
+        "error": "Bad Request",
+        "message": message,
+    }, status.HTTP_400_BAD_REQUEST
+
+
+@api.errorhandler(StaleVersionError)
+def stale_version_error(error):
+    """Handles updates that lost a race with another update"""
+    message = str(error)
+    app.logger.warning(message)
+    return {
+        "status": status.HTTP_412_PRECONDITION_FAILED,
+        "error": "Precondition Failed",
+        "message": message,
+    }, status.HTTP_412_PRECONDITION_FAILED
 
 
 ######################################################################
@@ -122,6 +369,50 @@ def health_check():
     return jsonify(status=200, message="Healthy"), status.HTTP_200_OK
 
 
+######################################################################
+# GET LIVENESS AND READINESS
+######################################################################
+@app.route("/health/live")
+def liveness_check():
+    """Let them know the worker is running, without touching the database"""
+    return jsonify(status=200, message="Alive"), status.HTTP_200_OK
+
+
+@app.route("/health/ready")
+def readiness_check():
+    """Let them know whether the worker can reach the database"""
+    result = readiness.check(
+        db.engine,
+        app.config["HEALTH_CHECK_TIMEOUT_MS"],
+        app.config["HEALTH_CHECK_TTL"],
+    )
+    if result["ready"]:
+        return jsonify(status=200, message="Ready", **result), status.HTTP_200_OK
+    return (
+        jsonify(status=503, message="Not Ready", **result),
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
+######################################################################
+# GET PROMETHEUS METRICS
+######################################################################
+@app.route("/metrics")
+def prometheus_metrics():
+    """Request and database metrics of every worker for Prometheus"""
+    data, content_type = render_metrics()
+    return Response(data, status=status.HTTP_200_OK, content_type=content_type)
+
+
+######################################################################
+# GET CONNECTION POOL STATISTICS
+######################################################################
+@app.route("/internal/pool")
+def pool_statistics():
+    """Usage and wait statistics of the connection pool of this worker"""
+    return jsonify(pid=os.getpid(), **pool_status(db.engine.pool)), status.HTTP_200_OK
+
+
 ######################################################################
 # GET INDEX
 ######################################################################
@@ -148,8 +439,8 @@ class WishlistResource(Resource):
     # RETRIEVE A WISHLIST
     ######################################################################
     @api.doc("get_wishlist")
+    @api.response(200, "Success", wishlist_model)
     @api.response(404, "wishlist not found")
-    @api.marshal_with(wishlist_model)
     def get(self, wishlist_id):
         """
         Retrieve a single Wishlist
@@ -158,21 +449,46 @@ class WishlistResource(Resource):
         """
         app.logger.info("Request for Wishlist with id: %s", wishlist_id)
 
-        # See if the wishlist exists and abort if it doesn't
-        wishlist = Wishlist.find(wishlist_id)
-        if not wishlist:
-            abort(
-                status.HTTP_404_NOT_FOUND,
-                description=f"Wishlist with id '{wishlist_id}' could not be found.",
-            )
-
-        return wishlist.serialize(), status.HTTP_200_OK
+        key = Wishlist.cache_key(wishlist_id)
+        cached = cache.get(key)
+        if cached is None and request.if_none_match:
+            # revalidating a copy the client has only needs the version
+            version = Wishlist.find_version(wishlist_id)
+            if version is None:
+                abort(
+                    status.HTTP_404_NOT_FOUND,
+                    description=f"Wishlist with id '{wishlist_id}' could not be found.",
+                )
+            etag = make_etag(version)
+            if request.if_none_match.contains_weak(etag):
+                return "", status.HTTP_304_NOT_MODIFIED, etag_headers(etag)
+
+        if cached is None:
+            # See if the wishlist exists and abort if it doesn't
+            wishlist = Wishlist.find(wishlist_id)
+            if not wishlist:
+                abort(
+                    status.HTTP_404_NOT_FOUND,
+                    description=f"Wishlist with id '{wishlist_id}' could not be found.",
+                )
+            # writes to the wishlist or its items invalidate the cached copy
+            cached = {
+                "etag": make_etag(wishlist.version()),
+                "wishlist": wishlist.serialize(),
+            }
+            cache.set(key, cached)
+
+        headers = etag_headers(cached["etag"])
+        if request.if_none_match.contains_weak(cached["etag"]):
+            return "", status.HTTP_304_NOT_MODIFIED, headers
+        return json_response(cached["wishlist"], headers=headers)
 
     ######################################################################
     # UPDATE AN EXISTING WISHLIST
     ######################################################################
     @api.doc("update_wishlist")
     @api.response(404, "Wishlist was not found")
+    @api.response(412, "The resource was changed since it was retrieved")
     @api.response(400, "The posted data was not valid")
     @api.expect(wishlist_model)
     def put(self, wishlist_id):
@@ -191,6 +507,7 @@ class WishlistResource(Resource):
                 status.HTTP_404_NOT_FOUND,
                 description=f"Wishlist with id '{wishlist_id}' was not found.",
             )
+        check_if_match(make_etag(wishlist.version()))
 
         # Update from the json in the body of the request
         data = api.payload
@@ -199,7 +516,8 @@ class WishlistResource(Resource):
         wishlist.update()
         app.logger.info("Wishlist with ID: %d updated.", wishlist.id)
 
-        return wishlist.serialize(), status.HTTP_200_OK
+        headers = etag_headers(make_etag(wishlist.version()))
+        return wishlist.serialize(), status.HTTP_200_OK, headers
 
     ######################################################################
     # DELETE A WISHLIST
@@ -227,11 +545,12 @@ class WishlistCollection(Resource):
 
     @api.doc("List wishlists")
     @api.expect(wishlist_args, validate=True)
-    @api.marshal_list_with(wishlist_model)
+    @api.response(200, "Success", [wishlist_model])
     def get(self):
         """Returns all wishlists, if GET request contains name, return wishlist by name, same for userid"""
         wishlists = []
 
+        args = wishlist_args.parse_args()
         name = request.args.get("name")
         userid = request.args.get("userid")
         date_created = request.args.get("date_created")
@@ -253,9 +572,12 @@ class WishlistCollection(Resource):
             wishlists = Wishlist.find_since_date(since_date)
         else:
             app.logger.info("Request for listing all Wishlists")
-            wishlists = Wishlist.all()
-        results = [wishlist.serialize() for wishlist in wishlists]
-        return results, status.HTTP_200_OK
+            wishlists = Wishlist.query
+
+        results, next_id = list_wishlists(wishlists, args)
+        return json_response(
+            results, headers=next_page_header(WishlistCollection, next_id)
+        )
 
     ######################################################################
     # CREATE A NEW WISHLIST
@@ -287,6 +609,139 @@ class WishlistCollection(Resource):
         return message, status.HTTP_201_CREATED, {"Location": location_url}
 
 
+######################################################################
+# PATH: /wishlists:batch
+######################################################################
+@api.route("/wishlists:batch")
+class WishlistBatchCollection(Resource):
+    """Handles creating many wishlists at once"""
+
+    ######################################################################
+    # CREATE MANY NEW WISHLISTS
+    ######################################################################
+    @api.doc("Create wishlists in bulk")
+    @api.response(400, "The posted data was not valid")
+    @api.response(413, "The batch holds too many wishlists")
+    @api.response(415, "The posted data was not JSON or NDJSON")
+    @api.expect([create_wishlist_model])
+    @api.marshal_list_with(wishlist_model, code=201)
+    def post(self):
+        """
+        Create many Wishlists with their Items
+
+        This endpoint takes a JSON array or an NDJSON stream of wishlists with
+        nested items and creates all of them in a single transaction. Nothing
+        is created when any of the wishlists is not valid.
+        """
+        app.logger.info("Request to create a batch of Wishlists")
+        wishlists = []
+        for position, document in enumerate(read_batch_documents()):
+            try:
+                wishlists.append(Wishlist.from_document(document))
+            except DataValidationError as error:
+                raise DataValidationError(
+                    f"Wishlist at index {position}: {error}"
+                ) from error
+
+        Wishlist.create_many(wishlists)
+        app.logger.info("Created %d wishlists", len(wishlists))
+
+        return [wishlist.serialize() for wishlist in wishlists], status.HTTP_201_CREATED
+
+
+######################################################################
+# PATH: /wishlists:export
+######################################################################
+@api.route("/wishlists:export")
+class WishlistExport(Resource):
+    """Handles exporting all of the wishlists"""
+
+    @api.doc("Export wishlists")
+    @api.produces(["application/x-ndjson"])
+    @api.response(200, "One wishlist with its items per line", wishlist_model)
+    def get(self):
+        """
+        Export every Wishlist as NDJSON
+
+        This endpoint streams one JSON wishlist with its items per line. Rows
+        are read from a server-side cursor while the response is being sent,
+        so the export never holds the whole table in memory.
+        """
+        app.logger.info("Request to export all Wishlists")
+        lines = (
+            dumps(wishlist.serialize()) + b"\n"
+            for wishlist in Wishlist.stream(app.config["EXPORT_BATCH_SIZE"])
+        )
+        return Response(
+            stream_with_context(lines),
+            status=status.HTTP_200_OK,
+            mimetype="application/x-ndjson",
+        )
+
+
+######################################################################
+# PATH: /wishlists/<wishlist_id>/stats
+######################################################################
+@api.route("/wishlists/<int:wishlist_id>/stats")
+@api.param("wishlist_id", "The wishlist identifier")
+class WishlistStats(Resource):
+    """Handles the statistics of the items of a wishlist"""
+
+    @api.doc("get_wishlist_stats")
+    @api.response(200, "Success", wishlist_stats_model)
+    @api.response(404, "The wishlist was not found")
+    def get(self, wishlist_id):
+        """
+        Retrieve the statistics of a Wishlist
+
+        This endpoint returns the count and total price of the items of a
+        Wishlist for every status, added up by the database
+        """
+        app.logger.info("Request for the stats of Wishlist with id: %s", wishlist_id)
+        key = Wishlist.stats_key(wishlist_id)
+        stats = cache.get(key)
+        if stats is None:
+            stats = Wishlist.find_stats(wishlist_id=wishlist_id)
+            if stats is None:
+                abort(
+                    status.HTTP_404_NOT_FOUND,
+                    description=f"Wishlist with id '{wishlist_id}' could not be found.",
+                )
+            # writes to the items of the wishlist invalidate the cached copy
+            cache.set(key, stats)
+        return json_response({"wishlist_id": wishlist_id, **stats})
+
+
+######################################################################
+# PATH: /users/<userid>/stats
+######################################################################
+@api.route("/users/<string:userid>/stats")
+@api.param("userid", "The user identifier")
+class UserStats(Resource):
+    """Handles the statistics of the items of all wishlists of a user"""
+
+    @api.doc("get_user_stats")
+    @api.response(200, "Success", user_stats_model)
+    @api.response(404, "The user has no wishlists")
+    def get(self, userid):
+        """
+        Retrieve the statistics of the Wishlists of a user
+
+        This endpoint returns the count and total price of the items of all
+        Wishlists of a user for every status, added up by the database
+        """
+        app.logger.info("Request for the stats of the Wishlists of user: %s", userid)
+        # not cached, an item write only knows its wishlist and not the user
+        # whose statistics it changes
+        stats = Wishlist.find_stats(userid=userid)
+        if stats is None:
+            abort(
+                status.HTTP_404_NOT_FOUND,
+                description=f"User '{userid}' has no wishlists.",
+            )
+        return json_response({"userid": userid, **stats})
+
+
 ######################################################################
 # PATH: /wishlist/<wishlist_id>/items/<item_id>
 ######################################################################
@@ -301,6 +756,7 @@ class ItemResource(Resource):
     ######################################################################
     @api.doc("update_item")
     @api.response(404, "Resource was not found")
+    @api.response(412, "The resource was changed since it was retrieved")
     @api.expect(item_model)
     @api.marshal_with(item_model)
     def put(self, wishlist_id, item_id):
@@ -321,27 +777,28 @@ class ItemResource(Resource):
         item_data = request.get_json()
 
         # Find the wishlist and item
-        wishlist = Wishlist.find(wishlist_id)
-        if not wishlist:
-            app.logger.error(f"Wishlist with id '{wishlist_id}' not found.")
-            abort(
-                status.HTTP_404_NOT_FOUND,
-                description=f"Wishlist with id '{wishlist_id}' not found.",
-            )
         item = find_item_in_wishlist(wishlist_id, item_id)
-
-        # Check for duplicate item name within the same wishlist
-        check_for_duplicate_item(wishlist_id, item_data["name"], item_id)
+        check_if_match(make_etag(item.version()))
 
         # Update the item's details
         update_item_details(item, item_data)
 
-        # Commit the changes to the database
-        save_updated_item(item)
-        item.update()
-        # print(item.id)
+        # Commit the changes to the database, the unique index on the item
+        # names of a wishlist rejects a duplicate name as part of the UPDATE
+        try:
+            item.update()
+        except DuplicateError:
+            app.logger.error(
+                f"Item with name '{item_data['name']}' already exists in wishlist '{wishlist_id}'."
+            )
+            abort(
+                status.HTTP_409_CONFLICT,
+                description=f"Item with name '{item_data['name']}' already exists in wishlist '{wishlist_id}'.",
+            )
+
         # Serialize the updated item and return the response
-        return item.serialize(), status.HTTP_200_OK
+        headers = etag_headers(make_etag(item.version()))
+        return item.serialize(), status.HTTP_200_OK, headers
         # return generate_update_response(wishlist_id, item)
 
     ######################################################################
@@ -349,8 +806,8 @@ class ItemResource(Resource):
     ######################################################################
 
     @api.doc("get_item")
+    @api.response(200, "Success", item_model)
     @api.response(404, "Resource not found")
-    @api.marshal_with(item_model)
     def get(self, wishlist_id, item_id):
         """
         Retrieve a specific Item from a Wishlist
@@ -361,27 +818,13 @@ class ItemResource(Resource):
             f"Request for item with id: {item_id} in wishlist {wishlist_id}"
         )
 
-        # Find the wishlist
-        wishlist = Wishlist.find(wishlist_id)
-        if not wishlist:
-            app.logger.error(f"Wishlist with id '{wishlist_id}' not found.")
-            abort(
-                status.HTTP_404_NOT_FOUND,
-                description=f"Wishlist with id '{wishlist_id}' not found.",
-            )
-
-        # Find the item within the wishlist
-        item = Item.query.filter_by(wishlist_id=wishlist_id, id=item_id).first()
-        if not item:
-            app.logger.error(
-                f"Item with id '{item_id}' not found in wishlist '{wishlist_id}'."
-            )
-            abort(
-                status.HTTP_404_NOT_FOUND,
-                description=f"Item with id '{item_id}' not found in wishlist '{wishlist_id}'.",
-            )
+        # Find the wishlist and the item within it
+        item = find_item_in_wishlist(wishlist_id, item_id)
 
-        return item.serialize(), status.HTTP_200_OK
+        etag = make_etag(item.version())
+        if request.if_none_match.contains_weak(etag):
+            return "", status.HTTP_304_NOT_MODIFIED, etag_headers(etag)
+        return json_response(item.serialize(), headers=etag_headers(etag))
 
     ######################################################################
     # DELETE A SPECIFIC ITEM FROM A WISHLIST
@@ -399,17 +842,14 @@ class ItemResource(Resource):
             f"Request to delete item with id: {item_id} from wishlist with id: {wishlist_id}"
         )
 
-        # Find the wishlist
-        wishlist = Wishlist.find(wishlist_id)
-        if not wishlist:
+        # Find the wishlist and the item within it
+        found, item = Item.find_in_wishlist(wishlist_id, item_id)
+        if not found:
             app.logger.error(f"Wishlist with id '{wishlist_id}' not found.")
             abort(
                 status.HTTP_404_NOT_FOUND,
                 description=f"Wishlist with id '{wishlist_id}' not found.",
             )
-
-        # Find the item within the wishlist
-        item = Item.query.filter_by(wishlist_id=wishlist_id, id=item_id).first()
         if item:
             item.delete()
         else:
@@ -432,26 +872,54 @@ class ItemCollection(Resource):
     """This class handles the processing of single item data."""
 
     @api.doc("list_items")
-    @api.marshal_list_with(item_model)
+    @api.expect(item_args, validate=True)
+    @api.response(200, "Success", [item_model])
     ######################################################################
     # LIST ALL ITEMS IN AN EXISTING WISHLIST
     ######################################################################
     def get(self, wishlist_id):
-        """Returns all items"""
+        """Returns all items, filtered, sorted and paged by the query arguments"""
         app.logger.info(
             "Request to list all items from wishlist with id: %s", wishlist_id
         )
         # check_content_type("application/json")
+        args = item_args.parse_args()
 
-        wishlist = Wishlist.find(wishlist_id)
-        if not wishlist:
+        version = Wishlist.find_version(wishlist_id)
+        if version is None:
             abort(
                 status.HTTP_404_NOT_FOUND,
                 description=f"Wishlist with id '{wishlist_id}' was not found.",
             )
-        myitems = wishlist.items
-        results = [item.serialize() for item in myitems]
-        return results, status.HTTP_200_OK
+        # the listing changes with the items and with the query arguments
+        etag = make_etag((version, request.query_string))
+        if request.if_none_match.contains_weak(etag):
+            return "", status.HTTP_304_NOT_MODIFIED, etag_headers(etag)
+
+        # filter, sort and page in the database instead of loading wishlist.items
+        sort = args["sort"]
+        items = Item.find_by_filters(
+            wishlist_id,
+            status=args["status"],
+            min_price=args["min_price"],
+            max_price=args["max_price"],
+            name=args["name"],
+        )
+        items, next_id = Item.keyset_page(
+            items,
+            args["after_id"],
+            args["limit"],
+            sort_by=ITEM_SORT_KEYS[sort.lstrip("-")],
+            descending=sort.startswith("-"),
+        )
+        results = [item.serialize() for item in items]
+        return json_response(
+            results,
+            headers={
+                **etag_headers(etag),
+                **next_page_header(ItemCollection, next_id, wishlist_id=wishlist_id),
+            },
+        )
 
     ######################################################################
     # ADD A NEW ITEM TO A SPECIFIC WISHLIST
@@ -474,9 +942,8 @@ class ItemCollection(Resource):
         # Ensure the request content type is application/json
         check_content_type("application/json")
 
-        # Find the wishlist by ID
-        wishlist = Wishlist.find(wishlist_id)
-        if not wishlist:
+        # Make sure the wishlist exists
+        if not Wishlist.exists(wishlist_id):
             app.logger.error(f"Wishlist with id '{wishlist_id}' not found.")
             abort(
                 status.HTTP_404_NOT_FOUND,
@@ -489,11 +956,8 @@ class ItemCollection(Resource):
         item_data["wishlist_id"] = wishlist_id
         new_item.deserialize(item_data)
 
-        # Check if an item with the same name already exists in the wishlist
-        existing_item = Item.query.filter_by(
-            wishlist_id=wishlist_id, name=new_item.name
-        ).first()
-        if existing_item:
+        # Add the new item unless an item with the same name already exists
+        if not new_item.create_unique():
             app.logger.error(
                 f"Item with name '{new_item.name}' already exists in wishlist '{wishlist_id}'."
             )
@@ -502,8 +966,6 @@ class ItemCollection(Resource):
                 description=f"Item with name '{new_item.name}' already exists in wishlist '{wishlist_id}'.",
             )
 
-        # Add the new item to the database
-        new_item.create()
         # Serialize the new item for the response
         serialized_item = new_item.serialize()
 
@@ -523,6 +985,119 @@ class ItemCollection(Resource):
         )
 
 
+######################################################################
+# PATH: /wishlist/<wishlist_id>/items:batch
+######################################################################
+@api.route("/wishlists/<int:wishlist_id>/items:batch")
+@api.param("wishlist_id", "The Wishlist Identifier")
+class ItemBatchCollection(Resource):
+    """This class handles adding many items to a wishlist at once."""
+
+    ######################################################################
+    # ADD MANY NEW ITEMS TO A SPECIFIC WISHLIST
+    ######################################################################
+    @api.doc("add_items_batch")
+    @api.response(201, "All items were created", [item_result_model])
+    @api.response(207, "Some items were not created", [item_result_model])
+    @api.response(400, "The posted data was not valid")
+    @api.response(404, "The wishlist was not found")
+    @api.response(415, "The posted data was not JSON or NDJSON")
+    @api.expect([create_item_model])
+    def post(self, wishlist_id):
+        """
+        Add many new items to a specific Wishlist
+
+        This endpoint takes a JSON array or an NDJSON stream of items and adds
+        them with multi-row inserts in a single transaction. The response has
+        one result per item, in the order they were sent.
+        """
+        app.logger.info(f"Request to add a batch of items to wishlist: {wishlist_id}")
+        documents = read_batch_documents()
+
+        if not Wishlist.exists(wishlist_id):
+            app.logger.error(f"Wishlist with id '{wishlist_id}' not found.")
+            abort(
+                status.HTTP_404_NOT_FOUND,
+                description=f"Wishlist with id '{wishlist_id}' not found.",
+            )
+
+        # validate every item first so that bad ones are reported, not inserted
+        results = []
+        pending = []
+        for position, document in enumerate(documents):
+            result = {"index": position}
+            results.append(result)
+            try:
+                pending.append((deserialize_batch_item(document, wishlist_id), result))
+            except DataValidationError as error:
+                result.update(status=status.HTTP_400_BAD_REQUEST, message=str(error))
+
+        items = [item for item, _ in pending]
+        for (item, result), created in zip(pending, Item.create_many(items)):
+            if created:
+                result.update(status=status.HTTP_201_CREATED, id=item.id)
+            else:
+                result.update(
+                    status=status.HTTP_409_CONFLICT,
+                    message=f"Item with name '{item.name}' already exists in wishlist '{wishlist_id}'.",
+                )
+
+        app.logger.info(f"Added {len(items)} items to wishlist {wishlist_id}")
+        if all(result["status"] == status.HTTP_201_CREATED for result in results):
+            return results, status.HTTP_201_CREATED
+        return results, status.HTTP_207_MULTI_STATUS
+
+
+######################################################################
+# PATH: /items:transition
+######################################################################
+@api.route("/items:transition")
+class ItemTransition(Resource):
+    """Handles changing the status of many items at once"""
+
+    @api.doc("transition_items")
+    @api.expect(transition_model)
+    @api.response(200, "Success", transition_result_model)
+    @api.response(400, "The posted data was not valid")
+    @api.response(413, "Too many item ids were posted")
+    @api.response(415, "The posted data was not JSON")
+    def post(self):
+        """
+        Change the status of many Items
+
+        This endpoint sets the status of the items with the posted ids or of
+        the items that match the posted filters, like all PENDING items that
+        were not updated for 30 days. The items are changed without loading
+        them by one UPDATE ... RETURNING per batch of TRANSITION_BATCH_SIZE
+        items, each in its own transaction.
+        """
+        app.logger.info("Request to change the status of many items")
+        check_content_type("application/json")
+        new_status, criteria = read_transition(request.get_json())
+        if criteria.get("ids") is not None and (
+            len(criteria["ids"]) > app.config["BATCH_SIZE_MAX"]
+        ):
+            abort(
+                status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                description=f"At most {app.config['BATCH_SIZE_MAX']} ids can be posted",
+            )
+        count, ids = Item.transition(
+            new_status,
+            **criteria,
+            batch_size=app.config["TRANSITION_BATCH_SIZE"],
+            max_ids=app.config["BATCH_SIZE_MAX"],
+        )
+        app.logger.info("Changed the status of %d items to %s", count, new_status)
+        return json_response(
+            {
+                "status": new_status.value,
+                "count": count,
+                "ids": ids,
+                "truncated": count > len(ids),
+            }
+        )
+
+
 ######################################################################
 # PATH: /wishlist/<wishlist_id>/items/<item_id/purchase>
 ######################################################################
@@ -536,6 +1111,7 @@ class PurchaseResource(Resource):
     @api.expect(item_model)
     @api.marshal_with(item_model)
     @api.response(404, "Resource was not found")
+    @api.response(412, "The resource was changed since it was retrieved")
     def put(self, wishlist_id, item_id):
         """Purchase an item from a wishlist."""
         app.logger.info(
@@ -543,25 +1119,26 @@ class PurchaseResource(Resource):
         )
 
         # Find the wishlist and item
-        wishlist = Wishlist.find(wishlist_id)
-        if not wishlist:
-            app.logger.error(f"Wishlist with id '{wishlist_id}' not found.")
-            abort(
-                status.HTTP_404_NOT_FOUND,
-                description=f"Wishlist with id '{wishlist_id}' not found.",
-            )
         item = find_item_in_wishlist(wishlist_id, item_id)
+        check_if_match(make_etag(item.version()))
 
         app.logger.info(f"Purchase item id: {item_id} from Wishlist {wishlist_id}...")
         purchase_item_from_wishlist(item)
 
         # Return the updated order
-        return item.serialize(), status.HTTP_200_OK
+        headers = etag_headers(make_etag(item.version()))
+        return item.serialize(), status.HTTP_200_OK, headers
 
 
 def find_item_in_wishlist(wishlist_id, item_id):
-    """Find an item in the wishlist by its ID"""
-    item = Item.query.filter_by(wishlist_id=wishlist_id, id=item_id).first()
+    """Find an item in the wishlist by its ID, aborting if either is missing"""
+    found, item = Item.find_in_wishlist(wishlist_id, item_id)
+    if not found:
+        app.logger.error(f"Wishlist with id '{wishlist_id}' not found.")
+        abort(
+            status.HTTP_404_NOT_FOUND,
+            description=f"Wishlist with id '{wishlist_id}' not found.",
+        )
     if not item:
         app.logger.error(
             f"Item with id '{item_id}' not found in wishlist '{wishlist_id}'."
@@ -573,31 +1150,46 @@ def find_item_in_wishlist(wishlist_id, item_id):
     return item
 
 
-def check_for_duplicate_item(wishlist_id, item_name, item_id):
-    """Check if an item with the same name already exists in the wishlist"""
-    existing_item = Item.query.filter_by(
-        wishlist_id=wishlist_id, name=item_name
-    ).first()
-    if existing_item and existing_item.id != item_id:
-        app.logger.error(
-            f"Item with name '{item_name}' already exists in wishlist '{wishlist_id}'."
-        )
-        abort(
-            status.HTTP_409_CONFLICT,
-            description=f"Item with name '{item_name}' already exists in wishlist '{wishlist_id}'.",
-        )
-
-
 def update_item_details(item, item_data):
-    """Update the item details"""
-    item.name = item_data["name"]
-    item.description = item_data["description"]
-    item.price = float(item_data["price"])
-
-
-def save_updated_item(item):
-    """Save the updated item to the database"""
-    item.update()
+    """Update the item details, checking the whole body before changing any"""
+    try:
+        name = item_data["name"]
+        description = item_data["description"]
+        price = float(item_data["price"])
+    except (KeyError, TypeError, ValueError) as error:
+        raise DataValidationError(f"Invalid Item: {error}") from error
+    item.name = name
+    item.description = description
+    item.price = price
+
+
+def read_transition(document) -> tuple:
+    """Returns the new status and the filters of a posted transition
+
+    A transition needs the ids of the items or at least one filter, so that
+    a document with only a status cannot change every item
+    """
+    try:
+        new_status = item_status(document["status"])
+        criteria = {}
+        if document.get("ids") is not None:
+            criteria["ids"] = [int(item_id) for item_id in document["ids"]]
+        if document.get("from_status") is not None:
+            criteria["status"] = item_status(document["from_status"])
+        if document.get("older_than_days") is not None:
+            days = float(document["older_than_days"])
+            if days < 0:
+                raise ValueError("older_than_days must not be negative")
+            criteria["older_than"] = timedelta(days=days)
+        if document.get("wishlist_id") is not None:
+            criteria["wishlist_id"] = int(document["wishlist_id"])
+    except (AttributeError, KeyError, TypeError, ValueError) as error:
+        raise DataValidationError(f"Invalid transition: {error}") from error
+    if not criteria:
+        raise DataValidationError(
+            "Invalid transition: ids, from_status, older_than_days or wishlist_id is required"
+        )
+    return new_status, criteria
 
 
 def generate_update_response(wishlist_id, item):
@@ -630,6 +1222,145 @@ def purchase_item_from_wishlist(item):
 ######################################################################
 
 
+######################################################################
+# Serializes one page of a wishlist listing with the requested fields
+######################################################################
+def list_wishlists(query, args) -> tuple:
+    """Returns the documents of one page of wishlists and the next cursor
+
+    Unless the items are requested the wishlists are read with the count and
+    total price of their items from one GROUP BY query, no item is loaded
+    """
+    fields_list = args["fields"]
+    if fields_list is None:
+        wants_items = args["include_items"]
+    elif "items" in fields_list and not args["include_items"]:
+        abort(
+            status.HTTP_400_BAD_REQUEST,
+            description="The items field cannot be returned with include_items=false",
+        )
+    else:
+        wants_items = "items" in fields_list
+    if wants_items:
+        wishlists, next_id = Wishlist.keyset_page(
+            query, args["after_id"], args["limit"]
+        )
+        results = [wishlist.serialize() for wishlist in wishlists]
+        if fields_list is not None:
+            # the totals of loaded items are added up instead of queried
+            for result in results:
+                prices = [item["price"] for item in result["items"]]
+                result.update(item_count=len(prices), total_price=round(sum(prices), 2))
+    else:
+        rows, next_id = Wishlist.keyset_page(
+            Wishlist.with_totals(query), args["after_id"], args["limit"]
+        )
+        results = [Wishlist.serialize_totals(row) for row in rows]
+    if fields_list is not None:
+        results = [
+            {field: result[field] for field in fields_list} for result in results
+        ]
+    return results, next_id
+
+
+######################################################################
+# Builds the Link header that points to the next page of a listing
+######################################################################
+def next_page_header(resource, next_id, **values) -> dict:
+    """Returns a Link rel="next" header for the page after next_id
+
+    The query arguments of the request are copied to the query string of the
+    link as they are, never passed to url_for() where they could collide
+    with the values of the route
+    """
+    if next_id is None:
+        return {}
+    query = request.args.to_dict(flat=False)
+    query["after_id"] = [next_id]
+    next_url = api.url_for(resource, _external=True, **values)
+    return {"Link": f'<{next_url}?{urlencode(query, doseq=True)}>; rel="next"'}
+
+
+def deserialize_batch_item(document, wishlist_id):
+    """Creates an Item for a wishlist from one document of a batch"""
+    if not isinstance(document, dict):
+        raise DataValidationError("Invalid Item: expected a JSON object")
+    document["wishlist_id"] = wishlist_id
+    return Item().deserialize(document)
+
+
+######################################################################
+# Conditional request support
+######################################################################
+def make_etag(version) -> str:
+    """Returns the ETag of a resource from its version"""
+    return generate_etag(repr(version).encode("utf-8"))
+
+
+def etag_headers(etag) -> dict:
+    """Returns the headers that let clients revalidate a response by its ETag"""
+    return {"ETag": quote_etag(etag), "Cache-Control": "no-cache"}
+
+
+def check_if_match(etag) -> None:
+    """Aborts with 412 unless the If-Match header, when sent, matches the ETag
+
+    This only rejects clients that already hold a stale copy, the version
+    check of the UPDATE itself catches writers that race past this point
+    """
+    if request.if_match and not request.if_match.contains(etag):
+        abort(
+            status.HTTP_412_PRECONDITION_FAILED,
+            description="The resource was changed since it was retrieved.",
+        )
+
+
+######################################################################
+# Reads the documents posted to a batch endpoint
+######################################################################
+def read_batch_documents() -> list:
+    """Returns the documents of a JSON array or NDJSON request body
+
+    A line of an NDJSON stream that is not valid JSON is returned as None
+    so that it gets reported with the position it had in the stream. The
+    stream is read no further than the first record past BATCH_SIZE_MAX
+    """
+    content_type = request.headers.get("Content-Type", "")
+    if content_type == "application/x-ndjson":
+        documents = []
+        for line in request.stream:
+            if not line.strip():
+                continue
+            if len(documents) >= app.config["BATCH_SIZE_MAX"]:
+                abort_batch_too_large()
+            try:
+                documents.append(json.loads(line))
+            except ValueError:
+                documents.append(None)
+    elif content_type == "application/json":
+        documents = request.get_json()
+        if not isinstance(documents, list):
+            abort(status.HTTP_400_BAD_REQUEST, description="Expected a JSON array")
+    else:
+        app.logger.error("Invalid Content-Type: %s", content_type)
+        abort(
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            description="Content-Type must be application/json or application/x-ndjson",
+        )
+
+    if len(documents) > app.config["BATCH_SIZE_MAX"]:
+        abort_batch_too_large()
+    return documents
+
+
+def abort_batch_too_large() -> None:
+    """Aborts with 413 because a batch holds more than BATCH_SIZE_MAX records"""
+    abort(
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        description=f"A batch can hold at most {app.config['BATCH_SIZE_MAX']} records",
+    )
+
+
 ######################################################################
 # Checks the ContentType of a request
 ######################################################################
@@ -9,6 +9,8 @@ from unittest import TestCase
 from wsgi import app
 
 from service.models import Wishlist, Item, db
+from service.common.cache import cache
+from service.common.migrations import upgrade
 
 
 DATABASE_URI = os.getenv(
@@ -27,6 +29,7 @@ class BaseTestCase(TestCase):
         app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URI
         app.logger.setLevel(logging.CRITICAL)
         app.app_context().push()
+        upgrade(db.engine)
 
     @classmethod
     def tearDownClass(cls):
@@ -38,6 +41,7 @@ class BaseTestCase(TestCase):
         db.session.query(Wishlist).delete()  # clean up the last tests
         db.session.query(Item).delete()  # clean up the last tests
         db.session.commit()
+        cache.clear()
 
     def tearDown(self):
         """This runs after each test"""
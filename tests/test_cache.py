@@ -0,0 +1,181 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Cache Test Suite
+"""
+
+from unittest import TestCase
+from unittest.mock import patch, MagicMock
+from service.common.cache import Cache, LRUCache, NullCache, RedisCache
+
+
+class FakeRedis:
+    """An in-memory stand-in for the parts of redis.Redis the cache uses"""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    def get(self, key):
+        """Returns the value of a key"""
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        """Stores the value of a key"""
+        self.data[key] = value.encode()
+        self.expiry[key] = ex
+
+    def delete(self, *keys):
+        """Removes keys"""
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match):
+        """Returns the keys that start with the prefix of the pattern"""
+        return [key for key in list(self.data) if key.startswith(match.rstrip("*"))]
+
+
+class FakeTimer:  # pylint: disable=too-few-public-methods
+    """A clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+######################################################################
+#  T E S T   C A S E S
+######################################################################
+class TestLRUCache(TestCase):
+    """In-process Cache Tests"""
+
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.cache = LRUCache(maxsize=2, ttl=10, timer=self.timer)
+
+    def test_get_and_set(self):
+        """It should return the value that was set"""
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.set("a", {"id": 1})
+        self.assertEqual(self.cache.get("a"), {"id": 1})
+
+    def test_expiry(self):
+        """It should not return a value older than the ttl"""
+        self.cache.set("a", 1)
+        self.timer.now = 9.9
+        self.assertEqual(self.cache.get("a"), 1)
+        self.timer.now = 10
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_evicts_least_recently_used(self):
+        """It should evict the least recently used key when full"""
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("c"), 3)
+
+    def test_delete_and_clear(self):
+        """It should remove deleted keys and everything on clear"""
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.delete("a", "missing")
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("b"), 2)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get("b"))
+
+
+class TestRedisCache(TestCase):
+    """Redis Cache Tests"""
+
+    def setUp(self):
+        self.client = FakeRedis()
+        self.cache = RedisCache(self.client, ttl=30)
+
+    def test_get_and_set(self):
+        """It should keep JSON values under the service prefix"""
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.set("a", {"id": 1, "items": []})
+        self.assertEqual(self.cache.get("a"), {"id": 1, "items": []})
+        self.assertEqual(self.client.expiry["wishlists:a"], 30)
+
+    def test_delete_and_clear(self):
+        """It should only remove the keys of the service"""
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.client.data["other:a"] = b"1"
+        self.cache.delete()
+        self.cache.delete("a")
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIn("other:a", self.client.data)
+
+
+class TestCache(TestCase):
+    """Cache Facade Tests"""
+
+    def _app(self, backend):
+        """Returns a fake app configured with a cache backend"""
+        app = MagicMock()
+        app.config = {
+            "CACHE_BACKEND": backend,
+            "CACHE_TTL": 5,
+            "CACHE_MAXSIZE": 10,
+            "REDIS_URI": "redis://cache:6379/0",
+        }
+        return app
+
+    def test_init_app_backends(self):
+        """It should create the configured backend"""
+        cache = Cache()
+        self.assertIsInstance(cache.backend, NullCache)
+        cache.init_app(self._app("memory"))
+        self.assertIsInstance(cache.backend, LRUCache)
+        self.assertEqual(cache.backend.ttl, 5)
+        cache.init_app(self._app("none"))
+        self.assertIsInstance(cache.backend, NullCache)
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", 1)
+        cache.delete("a")
+        cache.clear()
+
+    @patch("service.common.cache.connect_redis")
+    def test_init_app_redis(self, connect_mock):
+        """It should connect to the configured Redis"""
+        connect_mock.return_value = FakeRedis()
+        cache = Cache()
+        cache.init_app(self._app("redis"))
+        connect_mock.assert_called_once_with("redis://cache:6379/0")
+        cache.set("a", [1])
+        self.assertEqual(cache.get("a"), [1])
+
+    def test_backend_failures(self):
+        """It should treat a failing backend as a cache miss"""
+        cache = Cache()
+        cache.backend = MagicMock()
+        cache.backend.get.side_effect = ConnectionError()
+        cache.backend.set.side_effect = ConnectionError()
+        cache.backend.delete.side_effect = ConnectionError()
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", 1)
+        cache.delete("a")
@@ -20,13 +20,24 @@ CLI Command Extensions for Flask
 
 # pylint: disable=duplicate-code
 import os
+import json
+import tempfile
+from datetime import timedelta
 from unittest import TestCase
 from unittest.mock import patch, MagicMock
 from click.testing import CliRunner
 
 # pylint: disable=unused-import
 from wsgi import app  # noqa: F401
-from service.common.cli_commands import db_create  # noqa: E402
+from service.common.cli_commands import (  # noqa: E402
+    db_create,
+    db_upgrade,
+    items_expire,
+    wishlists_export,
+    wishlists_import,
+)
+from service.models import Item, Wishlist  # noqa: E402
+from tests.test_base import BaseTestCase  # noqa: E402
 
 
 class TestFlaskCLI(TestCase):
@@ -35,10 +46,153 @@ class TestFlaskCLI(TestCase):
     def setUp(self):
         self.runner = CliRunner()
 
+    @patch("service.common.cli_commands.upgrade")
     @patch("service.common.cli_commands.db")
-    def test_db_create(self, db_mock):
+    def test_db_create(self, db_mock, upgrade_mock):
         """It should call the db-create command"""
         db_mock.return_value = MagicMock()
         with patch.dict(os.environ, {"FLASK_APP": "wsgi:app"}, clear=True):
             result = self.runner.invoke(db_create)
             self.assertEqual(result.exit_code, 0)
+            upgrade_mock.assert_called_once_with(db_mock.engine)
+
+    @patch("service.common.cli_commands.upgrade")
+    def test_db_upgrade(self, upgrade_mock):
+        """It should apply the missing migrations"""
+        migration = MagicMock(version=3, description="Add columns")
+        upgrade_mock.return_value = [migration]
+        with patch.dict(os.environ, {"FLASK_APP": "wsgi:app"}, clear=True):
+            result = self.runner.invoke(db_upgrade, ["--target", "3"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Applied 3: Add columns", result.output)
+        self.assertEqual(upgrade_mock.call_args.args[1], 3)
+
+        upgrade_mock.return_value = []
+        with patch.dict(os.environ, {"FLASK_APP": "wsgi:app"}, clear=True):
+            result = self.runner.invoke(db_upgrade)
+        self.assertIn("up to date", result.output)
+
+    @patch("service.common.cli_commands.Wishlist")
+    def test_wishlists_export(self, wishlist_mock):
+        """It should write one wishlist per line"""
+        wishlist = MagicMock()
+        wishlist.serialize.return_value = {"id": 1, "name": "gifts", "items": []}
+        wishlist_mock.stream.return_value = [wishlist, wishlist]
+        with patch.dict(os.environ, {"FLASK_APP": "wsgi:app"}, clear=True):
+            result = self.runner.invoke(wishlists_export, ["--batch-size", "10"])
+        self.assertEqual(result.exit_code, 0)
+        wishlist_mock.stream.assert_called_once_with(10)
+        self.assertEqual(
+            result.output.splitlines(), ['{"id": 1, "name": "gifts", "items": []}'] * 2
+        )
+
+    def _write_file(self, suffix, text):
+        """Writes text to a temporary file and returns its name"""
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, delete=False, encoding="utf-8"
+        ) as source:
+            source.write(text)
+        self.addCleanup(os.remove, source.name)
+        return source.name
+
+    @patch("service.common.cli_commands.Wishlist.create_many")
+    def test_wishlists_import_ndjson(self, create_many_mock):
+        """It should import an NDJSON file in chunks"""
+        item = {"name": "phone", "description": "new", "price": 10, "status": "pending"}
+        wishlist = {"name": "gifts", "userid": "u1", "date_created": "2024-01-01"}
+        lines = [json.dumps({**wishlist, "items": [item]}) for _ in range(5)]
+        lines.insert(2, "{not json")
+        lines.insert(3, "")
+        lines.append(json.dumps({"name": "missing userid"}))
+        source = self._write_file(".ndjson", "\n".join(lines))
+        with patch.dict(os.environ, {"FLASK_APP": "wsgi:app"}, clear=True):
+            result = self.runner.invoke(wishlists_import, [source, "--chunk-size", "2"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(
+            [len(call.args[0]) for call in create_many_mock.call_args_list], [2, 2, 1]
+        )
+        self.assertIn("Skipping record at line 3", result.output)
+        self.assertIn("Skipping record at line 8", result.output)
+        self.assertIn(
+            "Imported 5 wishlists and 5 items, skipped 2 records", result.output
+        )
+
+    @patch("service.common.cli_commands.Wishlist.create_many")
+    def test_wishlists_import_csv(self, create_many_mock):
+        """It should import a CSV file with one row per item"""
+        source = self._write_file(
+            ".csv",
+            "name,userid,date_created,item_name,item_description,item_price,item_status\n"
+            "gifts,u1,2024-01-01,phone,new phone,10,\n"
+            "gifts,u1,2024-01-01,watch,new watch,20,favorite\n"
+            "empty,u2,2024-02-01,,,,\n"
+            "books,u1,2024-03-01,novel,a novel,,\n",
+        )
+        with patch.dict(os.environ, {"FLASK_APP": "wsgi:app"}, clear=True):
+            result = self.runner.invoke(wishlists_import, [source])
+        self.assertEqual(result.exit_code, 0, result.output)
+        wishlists = create_many_mock.call_args.args[0]
+        self.assertEqual([wishlist.name for wishlist in wishlists], ["gifts", "empty"])
+        self.assertEqual([item.name for item in wishlists[0].items], ["phone", "watch"])
+        self.assertEqual(wishlists[1].items, [])
+        self.assertIn("Skipping record at line 5", result.output)
+        self.assertIn(
+            "Imported 2 wishlists and 2 items, skipped 1 records", result.output
+        )
+
+    @patch("service.common.cli_commands.sweeper")
+    def test_items_expire(self, sweeper_mock):
+        """It should expire the stale items with the given age and batch size"""
+        sweeper_mock.sweep.return_value = 3
+        with patch.dict(os.environ, {"FLASK_APP": "wsgi:app"}, clear=True):
+            result = self.runner.invoke(
+                items_expire, ["--days", "7", "--batch-size", "50"]
+            )
+        self.assertEqual(result.exit_code, 0, result.output)
+        sweeper_mock.sweep.assert_called_once_with(timedelta(days=7), 50)
+        self.assertIn("Expired 3 items", result.output)
+
+    @patch("service.common.cli_commands.sweeper")
+    def test_items_expire_locked(self, sweeper_mock):
+        """It should report that another process is expiring items"""
+        sweeper_mock.sweep.return_value = None
+        with patch.dict(os.environ, {"FLASK_APP": "wsgi:app"}, clear=True):
+            result = self.runner.invoke(items_expire)
+        self.assertEqual(result.exit_code, 0, result.output)
+        sweeper_mock.sweep.assert_called_once_with(None, None)
+        self.assertIn("Another process is expiring items", result.output)
+
+
+class TestWishlistsImport(BaseTestCase):
+    """Flask CLI Import Tests against the database"""
+
+    def test_wishlists_import_rejected_records(self):
+        """It should skip the records the database rejects and import the others"""
+        item = {"name": "phone", "description": "new", "price": 10, "status": "pending"}
+        records = [
+            {"name": "good", "userid": "u1", "date_created": "2024-01-01"},
+            {"name": "twins", "userid": "u1", "date_created": "2024-01-01"},
+            {"name": "x" * 100, "userid": "u1", "date_created": "2024-01-01"},
+            {"name": "bad date", "userid": "u1", "date_created": "01/02/2024"},
+            {"name": "last", "userid": "u1", "date_created": "2024-01-01"},
+        ]
+        records[0]["items"] = [item]
+        records[1]["items"] = [item, item]
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".ndjson", delete=False, encoding="utf-8"
+        ) as source:
+            source.write("\n".join(json.dumps(record) for record in records))
+        self.addCleanup(os.remove, source.name)
+        with patch.dict(os.environ, {"FLASK_APP": "wsgi:app"}, clear=True):
+            result = CliRunner().invoke(
+                wishlists_import, [source.name, "--chunk-size", "2"]
+            )
+        self.assertEqual(result.exit_code, 0, result.output)
+        for line in (2, 3, 4):
+            self.assertIn(f"Skipping record at line {line}", result.output)
+        self.assertIn(
+            "Imported 2 wishlists and 1 items, skipped 3 records", result.output
+        )
+        wishlists = Wishlist.all()
+        self.assertEqual(sorted(w.name for w in wishlists), ["good", "last"])
+        self.assertEqual(len(Item.all()), 1)
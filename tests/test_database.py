@@ -0,0 +1,72 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Database Connection Test Suite
+"""
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+from sqlalchemy.exc import OperationalError
+from service.models import connect_db, ping_db
+from tests.test_base import BaseTestCase
+
+
+def starting_up():
+    """Returns the error of a database that does not accept connections yet"""
+    return OperationalError(
+        "SELECT 1", {}, Exception("the database system is starting up")
+    )
+
+
+######################################################################
+#  T E S T   C A S E S
+######################################################################
+class TestConnectDb(TestCase):
+    """Startup Connection Tests"""
+
+    def setUp(self):
+        self.app = MagicMock()
+        self.app.config = {"RETRY_COUNT": 3, "RETRY_DELAY": 0, "RETRY_MAX_DELAY": 0}
+
+    @patch("service.models.ping_db")
+    def test_retry(self, ping_mock):
+        """It should retry while the database is starting"""
+        ping_mock.side_effect = [starting_up(), starting_up(), None]
+        connect_db(self.app)
+        self.assertEqual(ping_mock.call_count, 3)
+
+    @patch("service.models.ping_db")
+    def test_give_up(self, ping_mock):
+        """It should give up after RETRY_COUNT attempts"""
+        ping_mock.side_effect = starting_up()
+        self.assertRaises(OperationalError, connect_db, self.app)
+        self.assertEqual(ping_mock.call_count, 3)
+
+    @patch("service.models.ping_db")
+    def test_other_errors(self, ping_mock):
+        """It should not retry errors that waiting does not fix"""
+        ping_mock.side_effect = ValueError("bad configuration")
+        self.assertRaises(ValueError, connect_db, self.app)
+        self.assertEqual(ping_mock.call_count, 1)
+
+
+class TestPingDb(BaseTestCase):
+    """Database Ping Tests"""
+
+    def test_ping(self):
+        """It should reach the database"""
+        ping_db()
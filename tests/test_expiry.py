@@ -0,0 +1,144 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Expiry Sweeper Test Suite
+"""
+
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+from sqlalchemy import text
+from wsgi import app
+from service.models import db, Item, ItemStatus
+from service.common.expiry import LOCK_KEY, ExpirySweeper
+from tests.factories import ItemFactory, WishlistFactory
+from tests.test_base import BaseTestCase
+
+
+######################################################################
+#  T E S T   C A S E S
+######################################################################
+class TestExpirySweeper(BaseTestCase):
+    """Expiry Sweeper Tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.sweeper = ExpirySweeper()
+        self.sweeper.init_app(app)
+        self.sweeper.batch_delay = 0
+
+    def tearDown(self):
+        self.sweeper.stop()
+        super().tearDown()
+
+    def _create_items(self, *entries):
+        """Creates items with a status that were last updated days ago"""
+        wishlist = WishlistFactory()
+        wishlist.create()
+        items = []
+        for index, (item_status, days) in enumerate(entries):
+            item = ItemFactory(
+                wishlist=wishlist, name=f"gift-{index}", status=item_status
+            )
+            item.create()
+            db.session.execute(
+                text(
+                    "UPDATE item SET updated_at = now() - make_interval(days => :days) "
+                    "WHERE id = :id"
+                ),
+                {"days": days, "id": item.id},
+            )
+            items.append(item)
+        db.session.commit()
+        return items
+
+    def _statuses(self, items):
+        """Returns the statuses of the items in the database"""
+        db.session.expire_all()
+        return [Item.find(item.id).status for item in items]
+
+    def test_sweep(self):
+        """It should expire the stale pending items in batches"""
+        stale = self._create_items(*[(ItemStatus.PENDING, 40)] * 5)
+        others = self._create_items((ItemStatus.PENDING, 1), (ItemStatus.FAVORITE, 40))
+        with patch.object(Item, "transition", wraps=Item.transition) as transition:
+            expired = self.sweeper.sweep(timedelta(days=30), batch_size=2)
+        self.assertEqual(expired, 5)
+        self.assertEqual(transition.call_count, 3)
+        self.assertEqual(self._statuses(stale), [ItemStatus.EXPIRED] * 5)
+        self.assertEqual(
+            self._statuses(others), [ItemStatus.PENDING, ItemStatus.FAVORITE]
+        )
+        # the lock was released
+        self.assertEqual(self.sweeper.sweep(), 0)
+
+    def test_sweep_skips_updated_items(self):
+        """It should leave an item alone that was updated after it was read"""
+        items = self._create_items((ItemStatus.PENDING, 40), (ItemStatus.PENDING, 40))
+        find_stale = Item.find_stale
+
+        def find_and_update(*args):
+            page = find_stale(*args)
+            db.session.execute(
+                text("UPDATE item SET updated_at = now() WHERE id = :id"),
+                {"id": items[1].id},
+            )
+            return page
+
+        with patch.object(Item, "find_stale", side_effect=find_and_update):
+            self.assertEqual(self.sweeper.sweep(), 1)
+        self.assertEqual(
+            self._statuses(items), [ItemStatus.EXPIRED, ItemStatus.PENDING]
+        )
+
+    def test_sweep_locked(self):
+        """It should not sweep while another process holds the lock"""
+        self._create_items((ItemStatus.PENDING, 40))
+        with db.engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": LOCK_KEY})
+            try:
+                self.assertIsNone(self.sweeper.sweep())
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+        self.assertEqual(self.sweeper.sweep(), 1)
+
+    def test_scheduler(self):
+        """It should sweep in the background until stopped"""
+        swept = threading.Event()
+        calls = []
+
+        def sweep():
+            calls.append(sweep)
+            if len(calls) == 1:
+                raise ValueError("the database is down")
+            swept.set()
+            return 0
+
+        self.sweeper.interval = 0.01
+        with patch.object(self.sweeper, "sweep", side_effect=sweep):
+            self.sweeper.start()
+            self.sweeper.start()  # already running
+            # the failed sweep did not stop the scheduler
+            self.assertTrue(swept.wait(5))
+            self.sweeper.stop()
+        self.assertGreaterEqual(len(calls), 2)
+
+    def test_scheduler_off(self):
+        """It should not start a scheduler without an interval"""
+        self.sweeper.interval = 0
+        self.sweeper.start()
+        self.assertIsNone(self.sweeper._thread)  # pylint: disable=protected-access
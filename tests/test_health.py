@@ -0,0 +1,103 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Health Check Test Suite
+"""
+
+import logging
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+from sqlalchemy.exc import OperationalError
+from wsgi import app
+from service.common import status
+from service.common.health import ReadinessCheck, check_database, readiness
+from service.common.pool import MeteredQueuePool
+from service.models import db
+from .test_cache import FakeTimer
+
+
+######################################################################
+#  T E S T   C A S E S
+######################################################################
+class TestHealth(TestCase):
+    """Liveness and Readiness Tests"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Run once before all tests"""
+        app.config["TESTING"] = True
+        app.logger.setLevel(logging.CRITICAL)
+        app.app_context().push()
+
+    def setUp(self):
+        self.client = app.test_client()
+        readiness._result = None  # pylint: disable=protected-access
+
+    def test_liveness(self):
+        """It should be alive without asking the database"""
+        with patch.object(db.engine, "connect") as connect:
+            resp = self.client.get("/health/live")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.get_json()["message"], "Alive")
+        connect.assert_not_called()
+
+    def test_readiness(self):
+        """It should be ready when the database answers"""
+        resp = self.client.get("/health/ready")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        data = resp.get_json()
+        self.assertTrue(data["ready"])
+        self.assertEqual(data["database"], "ok")
+        self.assertEqual(data["pool"]["class"], "MeteredQueuePool")
+        self.assertLess(data["pool"]["saturation"], 1)
+
+    def test_not_ready(self):
+        """It should answer 503 when the database does not answer"""
+        error = OperationalError("SELECT 1", {}, Exception("connection refused"))
+        with patch.object(db.engine, "connect", side_effect=error):
+            resp = self.client.get("/health/ready")
+        self.assertEqual(resp.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        data = resp.get_json()
+        self.assertFalse(data["ready"])
+        self.assertIn("connection refused", data["database"])
+
+    def test_pool_exhausted(self):
+        """It should not wait for a connection from an exhausted pool"""
+        engine = MagicMock()
+        engine.pool = MeteredQueuePool(MagicMock, pool_size=1, max_overflow=0)
+        connection = engine.pool.connect()
+        result = check_database(engine, 100)
+        self.assertFalse(result["ready"])
+        self.assertEqual(result["database"], "connection pool exhausted")
+        self.assertEqual(result["pool"]["saturation"], 1)
+        engine.connect.assert_not_called()
+        connection.close()
+
+    def test_cached_result(self):
+        """It should check the database at most once per ttl"""
+        timer = FakeTimer()
+        check = ReadinessCheck(timer=timer)
+        with patch("service.common.health.check_database") as check_mock:
+            check_mock.return_value = {"ready": True}
+            check.check("engine", 100, 2)
+            timer.now = 1.9
+            check.check("engine", 100, 2)
+            self.assertEqual(check_mock.call_count, 1)
+            timer.now = 2
+            check.check("engine", 100, 2)
+            self.assertEqual(check_mock.call_count, 2)
+        check_mock.assert_called_with("engine", 100)
@@ -4,8 +4,12 @@ Test cases for Item Model
 """
 
 import os
+from datetime import timedelta
+from unittest.mock import patch
 
-from service.models import Item, DataValidationError
+from sqlalchemy import text
+from service.models import db, Item, ItemStatus, DataValidationError, DuplicateError
+from service.models import StaleVersionError
 from tests.factories import ItemFactory, WishlistFactory
 from tests.test_base import BaseTestCase
 
@@ -83,6 +87,15 @@ class TestItem(BaseTestCase):
             str(context.exception).lower(),
         )
 
+    def test_deserialize_item_invalid_name(self):
+        """It should raise DataValidationError when the name is not a string"""
+        for name in (None, 7):
+            item_data = ItemFactory().serialize()
+            item_data["name"] = name
+            with self.assertRaises(DataValidationError) as context:
+                Item().deserialize(item_data)
+            self.assertIn("'name' must be a string", str(context.exception))
+
     def test_serialize_an_item(self):
         """It should serialize an Item"""
         item = ItemFactory()
@@ -124,3 +137,171 @@ class TestItem(BaseTestCase):
         self.assertEqual(updated_item.name, "Updated Laptop")
         self.assertEqual(updated_item.description, "Updated Gaming Laptop")
         self.assertEqual(float(updated_item.price), 1600.00)
+
+    def test_update_stale_item(self):
+        """It should not overwrite an Item that changed since it was read"""
+        wishlist = WishlistFactory()
+        item = ItemFactory(wishlist_id=wishlist.id)
+        item.create()
+        self.assertEqual(item.version_id, 1)
+        item.name = "first"
+        item.update()
+        self.assertEqual(item.version_id, 2)
+
+        # another writer commits on its own connection behind the back of this session
+        with db.engine.begin() as connection:
+            connection.execute(
+                text("UPDATE item SET name = 'other', version_id = 3 WHERE id = :id"),
+                {"id": item.id},
+            )
+        item.name = "second"
+        self.assertRaises(StaleVersionError, item.update)
+        self.assertEqual(Item.find(item.id).name, "other")
+
+    def test_update_duplicate_name(self):
+        """It should not rename an Item to the name of another Item"""
+        wishlist = WishlistFactory()
+        wishlist.create()
+        ItemFactory(wishlist=wishlist, name="phone").create()
+        item = ItemFactory(wishlist=wishlist, name="laptop")
+        item.create()
+        item = Item.find(item.id)
+        item.name = "phone"
+        self.assertRaises(DuplicateError, item.update)
+        self.assertEqual(Item.find(item.id).name, "laptop")
+
+    def test_find_in_wishlist(self):
+        """It should tell a missing Wishlist from a missing Item"""
+        wishlist = WishlistFactory()
+        wishlist.create()
+        item = ItemFactory(wishlist=wishlist)
+        item.create()
+        other = WishlistFactory()
+        other.create()
+        self.assertEqual(Item.find_in_wishlist(wishlist.id, item.id), (True, item))
+        self.assertEqual(Item.find_in_wishlist(wishlist.id, 0), (True, None))
+        self.assertEqual(Item.find_in_wishlist(other.id, item.id), (True, None))
+        self.assertEqual(Item.find_in_wishlist(0, item.id), (False, None))
+
+    def test_create_duplicate_name(self):
+        """It should not create two Items with the same name in a Wishlist"""
+        wishlist = WishlistFactory()
+        wishlist.create()
+        ItemFactory(wishlist=wishlist, name="phone").create()
+        item = ItemFactory(wishlist=wishlist, name="phone")
+        self.assertRaises(DataValidationError, item.create)
+        # the same name is fine in another wishlist
+        ItemFactory(name="phone").create()
+
+    def test_create_unique(self):
+        """It should create an Item only if its name is free in the Wishlist"""
+        wishlist = WishlistFactory()
+        wishlist.create()
+        item = ItemFactory(wishlist=None, wishlist_id=wishlist.id, name="phone")
+        self.assertTrue(item.create_unique())
+        self.assertIsNotNone(item.id)
+        self.assertEqual(Item.find(item.id).name, "phone")
+
+        duplicate = ItemFactory(wishlist=None, wishlist_id=wishlist.id, name="phone")
+        self.assertFalse(duplicate.create_unique())
+        self.assertIsNone(duplicate.id)
+
+    def test_create_unique_failed(self):
+        """It should not create an Item for a Wishlist that does not exist"""
+        item = ItemFactory(wishlist=None, wishlist_id=0)
+        self.assertRaises(DataValidationError, item.create_unique)
+
+    def test_find_by_filters_sorted_by_price(self):
+        """It should page through filtered Items sorted by price"""
+        wishlist = WishlistFactory()
+        wishlist.create()
+        for index, price in enumerate([30, 10, 20, 20, 40]):
+            item = ItemFactory(wishlist=wishlist, name=f"gift-{index}", price=price)
+            item.create()
+        ItemFactory(
+            wishlist=wishlist, name="other", status=ItemStatus.FAVORITE
+        ).create()
+
+        query = Item.find_by_filters(
+            wishlist.id, status=ItemStatus.PENDING, name="gift"
+        )
+        prices = []
+        page, next_id = Item.keyset_page(query, limit=2, sort_by=Item.price)
+        while True:
+            prices.extend(float(item.price) for item in page)
+            if next_id is None:
+                break
+            page, next_id = Item.keyset_page(query, next_id, 2, sort_by=Item.price)
+        self.assertEqual(prices, [10, 20, 20, 30, 40])
+
+        query = Item.find_by_filters(wishlist.id, min_price=20, max_price=30)
+        page, _ = Item.keyset_page(query, sort_by=Item.price, descending=True)
+        self.assertEqual([float(item.price) for item in page], [30, 20, 20])
+
+    def test_transition(self):
+        """It should change the status of the matching Items"""
+        wishlist = WishlistFactory()
+        wishlist.create()
+        items = []
+        for name, item_status in (
+            ("old", ItemStatus.PENDING),
+            ("new", ItemStatus.PENDING),
+            ("done", ItemStatus.EXPIRED),
+        ):
+            item = ItemFactory(wishlist=wishlist, name=name, status=item_status)
+            item.create()
+            items.append(item)
+        old, new, done = items[0], items[1], items[2]
+        db.session.execute(
+            text(
+                "UPDATE item SET updated_at = now() - interval '40 days' "
+                "WHERE name <> 'new'"
+            )
+        )
+        db.session.commit()
+
+        count, ids = Item.transition(
+            ItemStatus.EXPIRED,
+            status=ItemStatus.PENDING,
+            older_than=timedelta(days=30),
+            wishlist_id=wishlist.id,
+        )
+        self.assertEqual((count, ids), (1, [old.id]))
+        db.session.expire_all()
+        self.assertEqual(Item.find(old.id).status, ItemStatus.EXPIRED)
+        self.assertEqual(Item.find(old.id).version_id, 2)
+        self.assertEqual(Item.find(new.id).status, ItemStatus.PENDING)
+
+        # Items that already have the status are left alone
+        count, ids = Item.transition(ItemStatus.EXPIRED, ids=[old.id, new.id, done.id])
+        self.assertEqual((count, ids), (1, [new.id]))
+        self.assertEqual(Item.transition(ItemStatus.EXPIRED, ids=[new.id]), (0, []))
+
+    def test_transition_in_batches(self):
+        """It should change the matching Items batch by batch in the order of their ids"""
+        wishlist = WishlistFactory()
+        wishlist.create()
+        items = []
+        for index in range(5):
+            item = ItemFactory(
+                wishlist=wishlist, name=f"gift-{index}", status=ItemStatus.PENDING
+            )
+            item.create()
+            items.append(item)
+        with patch.object(db.session, "commit", wraps=db.session.commit) as commit:
+            count, ids = Item.transition(
+                ItemStatus.EXPIRED, wishlist_id=wishlist.id, batch_size=2, max_ids=3
+            )
+        self.assertEqual(commit.call_count, 3)
+        self.assertEqual(count, 5)
+        self.assertEqual(ids, sorted(item.id for item in items)[:3])
+        db.session.expire_all()
+        for item in items:
+            self.assertEqual(Item.find(item.id).status, ItemStatus.EXPIRED)
+
+    def test_transition_failed(self):
+        """It should raise DataValidationError when the update fails"""
+        with patch.object(db.session, "execute", side_effect=Exception("boom")):
+            self.assertRaises(
+                DataValidationError, Item.transition, ItemStatus.EXPIRED, ids=[1]
+            )
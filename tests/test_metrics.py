@@ -0,0 +1,155 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Metrics Test Suite
+"""
+
+import os
+import sys
+import logging
+import subprocess
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+from prometheus_client import REGISTRY
+from wsgi import app
+from service.common import status
+from service.common.metrics import render
+from service.models import db, Wishlist
+from service.common.migrations import upgrade
+from .factories import WishlistFactory
+
+
+def sample(name, **labels):
+    """Returns the current value of a sample, 0 when it was never recorded"""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+######################################################################
+#  T E S T   C A S E S
+######################################################################
+class TestMetrics(TestCase):
+    """Prometheus Metrics Tests"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Run once before all tests"""
+        app.config["TESTING"] = True
+        app.config["DEBUG"] = False
+        app.logger.setLevel(logging.CRITICAL)
+        app.app_context().push()
+        upgrade(db.engine)
+
+    def setUp(self):
+        """Runs before each test"""
+        self.client = app.test_client()
+        db.session.query(Wishlist).delete()
+        db.session.commit()
+
+    def tearDown(self):
+        """Runs after each test"""
+        db.session.remove()
+
+    def test_request_metrics(self):
+        """It should record latency, status and database use per resource"""
+        wishlist = WishlistFactory()
+        wishlist.create()
+        endpoint = "WishlistResource.get"
+        count = sample("http_request_duration_seconds_count", endpoint=endpoint)
+        found = sample("http_requests_total", endpoint=endpoint, status="200")
+        missing = sample("http_requests_total", endpoint=endpoint, status="404")
+        queries = sample("db_queries_per_request_sum", endpoint=endpoint)
+
+        resp = self.client.get(f"/api/wishlists/{wishlist.id}")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        resp = self.client.get("/api/wishlists/0")
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.assertEqual(
+            sample("http_request_duration_seconds_count", endpoint=endpoint),
+            count + 2,
+        )
+        self.assertEqual(
+            sample("http_requests_total", endpoint=endpoint, status="200"), found + 1
+        )
+        self.assertEqual(
+            sample("http_requests_total", endpoint=endpoint, status="404"),
+            missing + 1,
+        )
+        self.assertGreater(
+            sample("db_queries_per_request_sum", endpoint=endpoint), queries
+        )
+        # looking up a missing wishlist takes one query
+        queries = sample("db_queries_per_request_sum", endpoint=endpoint)
+        self.client.get("/api/wishlists/0")
+        self.assertEqual(
+            sample("db_queries_per_request_sum", endpoint=endpoint), queries + 1
+        )
+        self.assertEqual(sample("http_requests_in_flight"), 0)
+
+    def test_plain_and_unmatched_routes(self):
+        """It should name Flask routes by endpoint and group unknown URLs"""
+        health = sample("http_requests_total", endpoint="health_check", status="200")
+        unmatched = sample("http_requests_total", endpoint="unmatched", status="404")
+        self.client.get("/health")
+        self.client.get("/no/such/url")
+        self.assertEqual(
+            sample("http_requests_total", endpoint="health_check", status="200"),
+            health + 1,
+        )
+        self.assertEqual(
+            sample("http_requests_total", endpoint="unmatched", status="404"),
+            unmatched + 1,
+        )
+
+    def test_metrics_endpoint(self):
+        """It should return the metrics in the Prometheus text format"""
+        self.client.get("/health")
+        resp = self.client.get("/metrics")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.content_type.startswith("text/plain"))
+        text = resp.get_data(as_text=True)
+        self.assertIn(
+            'http_request_duration_seconds_bucket{endpoint="health_check"', text
+        )
+        self.assertIn("# TYPE db_queries_per_request histogram", text)
+
+    def test_render_multiprocess(self):
+        """It should collect the metrics of all workers from the shared directory"""
+        with tempfile.TemporaryDirectory() as directory:
+            with patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory}):
+                with patch("service.common.metrics.multiprocess") as multiprocess:
+                    data, _ = render()
+        multiprocess.MultiProcessCollector.assert_called_once()
+        self.assertEqual(data, b"")
+
+    def test_missing_multiprocess_directory(self):
+        """It should create the shared directory of the metrics when it is missing"""
+        with tempfile.TemporaryDirectory() as parent:
+            directory = os.path.join(parent, "metrics")
+            env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": directory}
+            # the multiprocess mode is chosen when prometheus_client is imported
+            result = subprocess.run(
+                [sys.executable, "-c", "import wsgi"],
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                env=env,
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertTrue(os.listdir(directory))
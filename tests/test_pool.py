@@ -0,0 +1,75 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Connection Pool Test Suite
+"""
+
+from unittest import TestCase
+from unittest.mock import MagicMock
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool
+from service.common.pool import MeteredQueuePool, pool_status
+
+
+######################################################################
+#  T E S T   C A S E S
+######################################################################
+class TestMeteredQueuePool(TestCase):
+    """Connection Pool Tests"""
+
+    def setUp(self):
+        self.pool = MeteredQueuePool(
+            MagicMock, pool_size=1, max_overflow=1, timeout=0.01
+        )
+
+    def test_status(self):
+        """It should report the usage of the pool"""
+        first = self.pool.connect()
+        second = self.pool.connect()
+        status = pool_status(self.pool)
+        self.assertEqual(status["class"], "MeteredQueuePool")
+        self.assertEqual(status["size"], 1)
+        self.assertEqual(status["checked_out"], 2)
+        self.assertEqual(status["overflow"], 1)
+        self.assertEqual(status["max_overflow"], 1)
+        self.assertEqual(status["checkouts"], 2)
+        self.assertGreaterEqual(status["wait_seconds_max"], 0)
+        first.close()
+        second.close()
+        status = pool_status(self.pool)
+        self.assertEqual(status["checked_out"], 0)
+        self.assertEqual(status["checked_in"], 1)
+
+    def test_timeout(self):
+        """It should count checkouts that gave up waiting"""
+        connections = [self.pool.connect(), self.pool.connect()]
+        self.assertRaises(PoolTimeoutError, self.pool.connect)
+        self.assertEqual(self.pool.stats.timeouts, 1)
+        self.assertGreaterEqual(self.pool.stats.wait_seconds_total, 0)
+        for connection in connections:
+            connection.close()
+
+    def test_recreate(self):
+        """It should keep the statistics when the pool is recreated"""
+        self.pool.connect().close()
+        pool = self.pool.recreate()
+        self.assertIs(pool.stats, self.pool.stats)
+        self.assertEqual(pool.size(), 1)
+
+    def test_other_pools(self):
+        """It should only report the class of pools without a queue"""
+        self.assertEqual(pool_status(NullPool(MagicMock)), {"class": "NullPool"})
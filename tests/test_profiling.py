@@ -0,0 +1,85 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+SQL Profiling Test Suite
+"""
+
+from unittest import TestCase
+from flask import Flask
+from sqlalchemy import create_engine, event, text
+from service.common.profiling import SqlProfiler
+
+
+######################################################################
+#  T E S T   C A S E S
+######################################################################
+class TestSqlProfiler(TestCase):
+    """SQL Profiler Tests"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        self.app = Flask(__name__)
+        self.app.config.update(SQL_PROFILING=True, SLOW_REQUEST_MS=0)
+
+        @self.app.route("/numbers/<int:count>")
+        def numbers(count):
+            with self.engine.connect() as conn:
+                for number in range(count):
+                    conn.execute(text("SELECT :number"), {"number": number})
+            return "ok"
+
+        self.profiler = SqlProfiler()
+
+    def tearDown(self):
+        for name in ("before_cursor_execute", "after_cursor_execute"):
+            handler = getattr(self.profiler, name)
+            if event.contains(self.engine, name, handler):
+                event.remove(self.engine, name, handler)
+
+    def test_server_timing(self):
+        """It should report the statements of a request in Server-Timing"""
+        self.app.config["SLOW_REQUEST_MS"] = 60000
+        self.profiler.init_app(self.app, self.engine)
+        with self.assertNoLogs("flask.app", level="WARNING"):
+            resp = self.app.test_client().get("/numbers/3")
+        timing = resp.headers["Server-Timing"]
+        self.assertRegex(
+            timing, r'^db;dur=[0-9.]+;desc="3 statements", app;dur=[0-9.]+$'
+        )
+
+    def test_slow_request_log(self):
+        """It should log the statements and parameters of a slow request"""
+        self.profiler.init_app(self.app, self.engine)
+        with self.assertLogs("flask.app", level="WARNING") as logs:
+            self.app.test_client().get("/numbers/2?slow=yes")
+        message = logs.output[0]
+        self.assertIn("Slow request GET /numbers/2?slow=yes", message)
+        self.assertIn("with 2 statements", message)
+        self.assertIn("SELECT ? ", message)
+        self.assertIn("(1,)", message)
+
+    def test_off(self):
+        """It should not touch requests when SQL_PROFILING is off"""
+        self.app.config["SQL_PROFILING"] = False
+        self.profiler.init_app(self.app, self.engine)
+        resp = self.app.test_client().get("/numbers/1")
+        self.assertNotIn("Server-Timing", resp.headers)
+        self.assertFalse(
+            event.contains(
+                self.engine, "after_cursor_execute", self.profiler.after_cursor_execute
+            )
+        )
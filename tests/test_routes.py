@@ -18,18 +18,23 @@
 TestWishlist API Service Test Suite
 """
 
-# pylint: disable=duplicate-code
+# pylint: disable=duplicate-code, too-many-lines
 import os
+import json
 import logging
+from contextlib import contextmanager
 from unittest.mock import patch
 from unittest import TestCase
 from datetime import date
+from sqlalchemy import event, text
 from werkzeug.exceptions import UnsupportedMediaType
 from wsgi import app
 
 from service.common import status
-from service.models import db, Wishlist, ItemStatus
+from service.common.cache import cache
+from service.models import db, Wishlist, ItemStatus, StaleVersionError
 from service.routes import check_content_type
+from service.common.migrations import upgrade
 from .factories import WishlistFactory, ItemFactory
 
 DATABASE_URI = os.getenv(
@@ -54,6 +59,7 @@ class TestWishlistService(TestCase):
         app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URI
         app.logger.setLevel(logging.CRITICAL)
         app.app_context().push()
+        upgrade(db.engine)
 
     @classmethod
     def tearDownClass(cls):
@@ -65,6 +71,7 @@ class TestWishlistService(TestCase):
         self.client = app.test_client()
         db.session.query(Wishlist).delete()  # clean up the last tests
         db.session.commit()
+        cache.clear()
 
     def tearDown(self):
         """This runs after each test"""
@@ -119,6 +126,20 @@ class TestWishlistService(TestCase):
 
         return items
 
+    @contextmanager
+    def _count_queries(self):
+        """Counts the SQL statements sent to the database inside the block"""
+        statements = []
+
+        def before_cursor_execute(_conn, _cursor, statement, *_args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
     ######################################################################
     #  W I S H L I S T   T E S T   C A S E S
     ######################################################################
@@ -144,6 +165,96 @@ class TestWishlistService(TestCase):
         data = resp.get_json()
         self.assertEqual(data["name"], wishlist.name)
 
+    def test_get_wishlist_cached(self):
+        """It should Read a Wishlist from the cache until it changes"""
+        wishlist = self._create_wishlists(1)[0]
+        url = f"{BASE_URL}/{wishlist.id}"
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        with self._count_queries() as statements:
+            cached = self.client.get(url)
+        self.assertEqual(statements, [])
+        self.assertEqual(cached.get_json(), resp.get_json())
+
+        # every write to the wishlist or its items invalidates the cache
+        item = self._create_items(wishlist.id, count=1)[0]
+        self.assertEqual(len(self.client.get(url).get_json()["items"]), 1)
+        item_url = f"{url}/items/{item.id}"
+        changes = [
+            lambda: self.client.put(
+                item_url, json={"name": "Renamed", "description": "d", "price": 5}
+            ),
+            lambda: self.client.put(f"{item_url}/purchase"),
+            lambda: self.client.delete(item_url),
+            lambda: self.client.post(
+                f"{url}/items:batch", json=[ItemFactory(name="Batch").serialize()]
+            ),
+        ]
+        for change in changes:
+            before = self.client.get(url).get_json()
+            self.assertLess(change().status_code, 300)
+            self.assertNotEqual(self.client.get(url).get_json(), before)
+
+        data = self.client.get(url).get_json()
+        data["name"] = "Renamed wishlist"
+        data["items"] = []
+        self.assertEqual(self.client.put(url, json=data).status_code, 200)
+        self.assertEqual(self.client.get(url).get_json()["name"], "Renamed wishlist")
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_pool_statistics(self):
+        """It should report the connection pool of the worker"""
+        resp = self.client.get("/internal/pool")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        data = resp.get_json()
+        self.assertEqual(data["class"], "MeteredQueuePool")
+        self.assertEqual(data["pid"], os.getpid())
+        self.assertEqual(data["size"], app.config["DB_POOL_SIZE"])
+        self.assertGreater(data["checkouts"], 0)
+
+    def test_get_wishlist_not_modified(self):
+        """It should answer 304 Not Modified while the Wishlist ETag matches"""
+        wishlist = self._create_wishlists(1)[0]
+        url = f"{BASE_URL}/{wishlist.id}"
+        resp = self.client.get(url)
+        etag = resp.headers["ETag"]
+        self.assertEqual(resp.headers["Cache-Control"], "no-cache")
+
+        headers = {"If-None-Match": etag}
+        with self._count_queries() as statements:
+            resp = self.client.get(url, headers=headers)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp.data, b"")
+        self.assertEqual(statements, [])
+        # If-None-Match uses the weak comparison
+        resp = self.client.get(url, headers={"If-None-Match": f"W/{etag}"})
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # without a cached copy only the version is read from the database
+        cache.clear()
+        with self._count_queries() as statements:
+            resp = self.client.get(url, headers=headers)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp.headers["ETag"], etag)
+        self.assertEqual(len(statements), 1)
+        cache.clear()
+        resp = self.client.get(url, headers={"If-None-Match": f"W/{etag}"})
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # a new item changes the ETag
+        self._create_items(wishlist.id, count=1)
+        cache.clear()
+        resp = self.client.get(url, headers=headers)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp.headers["ETag"], etag)
+        self.assertEqual(len(resp.get_json()["items"]), 1)
+        resp = self.client.get(url, headers={"If-None-Match": resp.headers["ETag"]})
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        resp = self.client.get(f"{BASE_URL}/0", headers=headers)
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_get_wishlist_not_found(self):
         """It should not Read an Wishlist that is not found"""
         resp = self.client.get(f"{BASE_URL}/0")
@@ -210,6 +321,29 @@ class TestWishlistService(TestCase):
         updated_wishlist = resp.get_json()
         self.assertEqual(updated_wishlist["name"], "new new new Name")
 
+    def test_update_wishlist_if_match(self):
+        """It should only Update a Wishlist when If-Match holds its current ETag"""
+        wishlist = self._create_wishlists(1)[0]
+        url = f"{BASE_URL}/{wishlist.id}"
+        resp = self.client.get(url)
+        etag = resp.headers["ETag"]
+        data = resp.get_json()
+
+        data["name"] = "first"
+        resp = self.client.put(url, json=data, headers={"If-Match": etag})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        new_etag = resp.headers["ETag"]
+        self.assertNotEqual(new_etag, etag)
+        self.assertEqual(self.client.get(url).headers["ETag"], new_etag)
+
+        # a second writer with the old copy is turned away
+        data["name"] = "second"
+        resp = self.client.put(url, json=data, headers={"If-Match": etag})
+        self.assertEqual(resp.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(self.client.get(url).get_json()["name"], "first")
+        resp = self.client.put(url, json=data, headers={"If-Match": "*"})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
     def test_update_wishlist_not_found(self):
         """Test the behavior of UPDATE with wishlist not found"""
         test_wishlist = WishlistFactory()
@@ -224,6 +358,126 @@ class TestWishlistService(TestCase):
         data = resp.get_json()
         self.assertEqual(len(data), 10)
 
+    def test_list_wishlists_document(self):
+        """It should encode the listed wishlists as they serialize"""
+        wishlists = self._create_wishlists(3)
+        resp = self.client.get(BASE_URL)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.content_type, "application/json")
+        data = resp.get_json()
+        self.assertEqual(data, [wishlist.serialize() for wishlist in wishlists])
+
+    def test_list_wishlists_without_items(self):
+        """It should list the item count and total price without the items"""
+        wishlists = self._create_wishlists(2)
+        empty, full = wishlists[0], wishlists[1]
+        for name, price in (("pen", 10.5), ("ink", 2.25)):
+            item = ItemFactory(wishlist_id=full.id, name=name, price=price)
+            resp = self.client.post(
+                f"{BASE_URL}/{full.id}/items", json=item.serialize()
+            )
+            self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        with self._count_queries() as statements:
+            resp = self.client.get(BASE_URL, query_string="include_items=false")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(statements), 1)
+        self.assertIn("GROUP BY", statements[0])
+        data = resp.get_json()
+        self.assertEqual([wishlist["id"] for wishlist in data], [empty.id, full.id])
+        self.assertNotIn("items", data[0])
+        self.assertEqual((data[0]["item_count"], data[0]["total_price"]), (0, 0.0))
+        self.assertEqual((data[1]["item_count"], data[1]["total_price"]), (2, 12.75))
+        self.assertEqual(data[1]["name"], full.name)
+
+    def test_list_wishlists_fields(self):
+        """It should only return the requested fields"""
+        wishlist = self._create_wishlists(1)[0]
+        self._create_items(wishlist.id, 2)
+        resp = self.client.get(BASE_URL, query_string="fields=id,name,item_count")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            resp.get_json(),
+            [{"id": wishlist.id, "name": wishlist.name, "item_count": 2}],
+        )
+        resp = self.client.get(BASE_URL, query_string="fields=items,item_count")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        data = resp.get_json()
+        self.assertEqual(sorted(data[0]), ["item_count", "items"])
+        self.assertEqual((len(data[0]["items"]), data[0]["item_count"]), (2, 2))
+
+    def test_list_wishlists_bad_fields(self):
+        """It should not list unknown fields or items with include_items=false"""
+        for query in (
+            "fields=id,color",
+            "fields=,",
+            "fields=items&include_items=false",
+        ):
+            resp = self.client.get(BASE_URL, query_string=query)
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, query)
+
+    def test_list_wishlists_paginated(self):
+        """It should page through all wishlists with a keyset cursor"""
+        wishlists = self._create_wishlists(5)
+        resp = self.client.get(BASE_URL, query_string="limit=2")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        seen = []
+        while True:
+            data = resp.get_json()
+            self.assertLessEqual(len(data), 2)
+            seen.extend(wishlist["id"] for wishlist in data)
+            if "Link" not in resp.headers:
+                break
+            self.assertIn('rel="next"', resp.headers["Link"])
+            next_url = resp.headers["Link"].split(";")[0].strip("<>")
+            resp = self.client.get(next_url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(seen, sorted(wishlist.id for wishlist in wishlists))
+
+    def test_list_wishlists_next_link_keeps_query(self):
+        """It should copy any query argument to the next page link"""
+        self._create_wishlists(2)
+        resp = self.client.get(
+            BASE_URL, query_string="_external=1&limit=1&tag=a%20b&after_id=0"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        next_url = resp.headers["Link"].split(";")[0].strip("<>")
+        self.assertIn("_external=1&limit=1&tag=a+b&after_id=", next_url)
+        self.assertEqual(next_url.count("after_id="), 1)
+
+    def test_list_wishlists_after_id(self):
+        """It should only List wishlists after the given cursor"""
+        wishlists = self._create_wishlists(3)
+        first_id = min(wishlist.id for wishlist in wishlists)
+        resp = self.client.get(BASE_URL, query_string=f"after_id={first_id}")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        data = resp.get_json()
+        self.assertEqual(len(data), 2)
+        self.assertNotIn("Link", resp.headers)
+        for wishlist in data:
+            self.assertGreater(wishlist["id"], first_id)
+
+    def test_list_wishlists_bad_limit(self):
+        """It should not List wishlists with an invalid page size"""
+        resp = self.client.get(BASE_URL, query_string="limit=0")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.get(BASE_URL, query_string="limit=abc")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_wishlists_query_count(self):
+        """It should List wishlists with items in a constant number of queries"""
+        for wishlist in self._create_wishlists(5):
+            self._create_items(wishlist.id, count=3)
+        db.session.expire_all()
+        with self._count_queries() as statements:
+            resp = self.client.get(BASE_URL)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        data = resp.get_json()
+        self.assertEqual(len(data), 5)
+        for wishlist in data:
+            self.assertEqual(len(wishlist["items"]), 3)
+        # one SELECT for the wishlists and one for all of their items
+        self.assertEqual(len(statements), 2)
+
     def test_get_wishlists_by_name(self):
         """Test the ability to GET wishlists by names"""
         wishlists = self._create_wishlists(3)
@@ -283,6 +537,99 @@ class TestWishlistService(TestCase):
         data = resp.get_json()
         self.assertEqual(len(data), 0)
 
+    def test_create_wishlists_batch(self):
+        """It should Create many wishlists with nested items in one request"""
+        documents = []
+        for i in range(10):
+            wishlist = WishlistFactory().serialize()
+            wishlist["items"] = [
+                {key: value for key, value in item.serialize().items() if key != "id"}
+                for item in ItemFactory.build_batch(3)
+            ]
+            for position, item in enumerate(wishlist["items"]):
+                item["name"] = f"Gift-{i}-{position}"
+            if i % 2:
+                del wishlist["items"]
+            documents.append(wishlist)
+
+        with self._count_queries() as statements:
+            resp = self.client.post(f"{BASE_URL}:batch", json=documents)
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        # one insert for the wishlists and one for all of their items
+        self.assertEqual(len(statements), 2)
+
+        data = resp.get_json()
+        self.assertEqual(len(data), 10)
+        for document, created in zip(documents, data):
+            resp = self.client.get(f"{BASE_URL}/{created['id']}")
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            wishlist = resp.get_json()
+            self.assertEqual(wishlist["name"], document["name"])
+            self.assertEqual(
+                sorted(item["name"] for item in wishlist["items"]),
+                sorted(item["name"] for item in document.get("items", [])),
+            )
+            self.assertEqual(
+                sorted(item["id"] for item in wishlist["items"]),
+                sorted(item["id"] for item in created["items"]),
+            )
+
+    def test_create_wishlists_batch_ndjson(self):
+        """It should Create many wishlists sent as NDJSON"""
+        lines = [json.dumps(WishlistFactory().serialize()) for _ in range(3)]
+        resp = self.client.post(
+            f"{BASE_URL}:batch",
+            data="\n".join(lines),
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        resp = self.client.get(BASE_URL)
+        self.assertEqual(len(resp.get_json()), 3)
+
+    def test_create_wishlists_batch_invalid(self):
+        """It should not Create any wishlist of a batch holding bad data"""
+        good = WishlistFactory().serialize()
+        duplicates = WishlistFactory().serialize()
+        item = ItemFactory().serialize()
+        duplicates["items"] = [item, item]
+        for bad in (
+            {"name": "not enough data"},
+            "text",
+            {**good, "items": {}},
+            {**good, "date_created": "01/02/2024"},
+        ):
+            resp = self.client.post(f"{BASE_URL}:batch", json=[good, bad])
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("index 1", resp.get_json()["message"])
+        resp = self.client.post(f"{BASE_URL}:batch", json=[good, duplicates])
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.get(BASE_URL)
+        self.assertEqual(resp.get_json(), [])
+
+    def test_create_wishlists_batch_invalid_not_testing(self):
+        """It should answer 400 for a bad batch entry when exceptions do not propagate"""
+        bad = {**WishlistFactory().serialize(), "date_created": "01/02/2024"}
+        with patch.dict(app.config, {"TESTING": False}):
+            resp = self.client.post(f"{BASE_URL}:batch", json=[bad])
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("index 0", resp.get_json()["message"])
+
+    def test_export_wishlists(self):
+        """It should stream every wishlist with its items as NDJSON"""
+        wishlists = self._create_wishlists(5)
+        self._create_items(wishlists[0].id, count=2)
+        with patch.dict(app.config, {"EXPORT_BATCH_SIZE": 2}):
+            resp = self.client.get(f"{BASE_URL}:export")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.mimetype, "application/x-ndjson")
+        lines = resp.get_data(as_text=True).splitlines()
+        exported = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [wishlist["id"] for wishlist in exported],
+            sorted(wishlist.id for wishlist in wishlists),
+        )
+        self.assertEqual(len(exported[0]["items"]), 2)
+
     def test_delete_wishlist(self):
         """Test to delete a wishlist"""
         wishlist = self._create_wishlists(1)[0]
@@ -293,11 +640,212 @@ class TestWishlistService(TestCase):
         resp = self.client.get(f"{BASE_URL}/{wishlist.id}")
         self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_delete_wishlist_with_items(self):
+        """It should delete a wishlist together with its items"""
+        wishlist = self._create_wishlists(1)[0]
+        items = self._create_items(wishlist.id, count=2)
+        resp = self.client.get(f"{BASE_URL}/{wishlist.id}")
+        self.assertEqual(len(resp.get_json()["items"]), 2)
+        resp = self.client.delete(f"{BASE_URL}/{wishlist.id}")
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
+        resp = self.client.get(f"{BASE_URL}/{wishlist.id}")
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+        resp = self.client.get(f"{BASE_URL}/{wishlist.id}/items/{items[0].id}")
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_delete_wishlist_not_found(self):
         """Test the behavior of DELETE with wishlist not found"""
         resp = self.client.delete(f"{BASE_URL}/0")
         self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
 
+    ######################################################################
+    #  S T A T S   E N D P O I N T   T E S T   C A S E S
+    ######################################################################
+
+    def _add_items(self, wishlist_id, *entries):
+        """Adds items with the given names, prices and statuses to a wishlist"""
+        for name, price, item_status in entries:
+            item = ItemFactory(
+                wishlist_id=wishlist_id, name=name, price=price, status=item_status
+            )
+            resp = self.client.post(
+                f"{BASE_URL}/{wishlist_id}/items", json=item.serialize()
+            )
+            self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+            item.id = resp.get_json()["id"]
+        return item
+
+    def test_get_wishlist_stats(self):
+        """It should add up the items of a wishlist by status in one query"""
+        wishlist = self._create_wishlists(1)[0]
+        self._add_items(
+            wishlist.id,
+            ("pen", 10.5, ItemStatus.PENDING),
+            ("ink", 2.25, ItemStatus.PENDING),
+            ("pad", 4.0, ItemStatus.PURCHASED),
+        )
+        url = f"{BASE_URL}/{wishlist.id}/stats"
+        with self._count_queries() as statements:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(statements), 1)
+        data = resp.get_json()
+        self.assertEqual(data["wishlist_id"], wishlist.id)
+        self.assertEqual(data["wishlist_count"], 1)
+        self.assertEqual((data["item_count"], data["total_price"]), (3, 16.75))
+        self.assertEqual(data["pending_value"], 12.75)
+        self.assertEqual(data["purchased_value"], 4.0)
+        self.assertEqual(
+            data["statuses"]["pending"], {"count": 2, "total_price": 12.75}
+        )
+        self.assertEqual(data["statuses"]["expired"], {"count": 0, "total_price": 0.0})
+        self.assertEqual(len(data["statuses"]), len(ItemStatus))
+
+        # served from the cache until an item is written
+        with self._count_queries() as statements:
+            self.assertEqual(self.client.get(url).get_json(), data)
+        self.assertEqual(statements, [])
+        self._add_items(wishlist.id, ("cap", 1.0, ItemStatus.FAVORITE))
+        self.assertEqual(self.client.get(url).get_json()["item_count"], 4)
+
+    def test_get_wishlist_stats_not_found(self):
+        """It should not return the stats of a missing wishlist"""
+        resp = self.client.get(f"{BASE_URL}/0/stats")
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_user_stats(self):
+        """It should add up the items of all wishlists of a user"""
+        wishlists = self._create_wishlists(3)
+        first, second, other = wishlists[0], wishlists[1], wishlists[2]
+        for wishlist in (first, second):
+            wishlist.userid = "stats-user"
+            resp = self.client.put(
+                f"{BASE_URL}/{wishlist.id}", json=wishlist.serialize()
+            )
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self._add_items(first.id, ("pen", 10.5, ItemStatus.PENDING))
+        item = self._add_items(second.id, ("pad", 4.0, ItemStatus.PENDING))
+        self._add_items(other.id, ("ink", 2.25, ItemStatus.PENDING))
+        url = "/api/users/stats-user/stats"
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        data = resp.get_json()
+        self.assertEqual(data["userid"], "stats-user")
+        self.assertEqual(data["wishlist_count"], 2)
+        self.assertEqual((data["item_count"], data["total_price"]), (2, 14.5))
+        self.assertEqual((data["pending_value"], data["purchased_value"]), (14.5, 0.0))
+
+        # not cached, so every write to the items of the user shows at once
+        with patch.object(cache, "get", wraps=cache.get) as cache_get:
+            resp = self.client.put(f"{BASE_URL}/{second.id}/items/{item.id}/purchase")
+        # an item write does not look up the owner of its wishlist
+        cache_get.assert_not_called()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        data = self.client.get(url).get_json()
+        self.assertEqual((data["pending_value"], data["purchased_value"]), (10.5, 4.0))
+        resp = self.client.post(
+            f"{BASE_URL}/{first.id}/items:batch",
+            json=[ItemFactory(wishlist_id=first.id, name="cap").serialize()],
+        )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.client.get(url).get_json()["item_count"], 3)
+
+        # and so does moving a wishlist to another user
+        first.userid = other.userid
+        resp = self.client.put(f"{BASE_URL}/{first.id}", json=first.serialize())
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(url).get_json()["wishlist_count"], 1)
+
+    def test_get_user_stats_not_found(self):
+        """It should not return the stats of a user without wishlists"""
+        resp = self.client.get("/api/users/nobody/stats")
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    ######################################################################
+    #  T R A N S I T I O N   E N D P O I N T   T E S T   C A S E S
+    ######################################################################
+
+    def test_transition_items_by_ids(self):
+        """It should change the status of the posted items in one statement"""
+        wishlist = self._create_wishlists(1)[0]
+        items = self._create_items(wishlist.id, 3)
+        url = f"{BASE_URL}/{wishlist.id}"
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        with self._count_queries() as statements:
+            resp = self.client.post(
+                "/api/items:transition",
+                json={"status": "PURCHASED", "ids": [items[0].id, items[1].id]},
+            )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(statements), 1)
+        self.assertIn("RETURNING", statements[0])
+        data = resp.get_json()
+        self.assertEqual(data["status"], "purchased")
+        self.assertEqual(data["count"], 2)
+        self.assertEqual(sorted(data["ids"]), [items[0].id, items[1].id])
+        # the cached wishlist was invalidated
+        statuses = [item["status"] for item in self.client.get(url).get_json()["items"]]
+        self.assertEqual(sorted(statuses), ["pending", "purchased", "purchased"])
+
+    def test_transition_items_by_filter(self):
+        """It should expire the pending items that were not updated for days"""
+        wishlist = self._create_wishlists(1)[0]
+        items = self._create_items(wishlist.id, 2)
+        db.session.execute(
+            text(
+                "UPDATE item SET updated_at = now() - interval '40 days' WHERE id = :id"
+            ),
+            {"id": items[0].id},
+        )
+        db.session.commit()
+        body = {"status": "expired", "from_status": "pending", "older_than_days": 30}
+        resp = self.client.post("/api/items:transition", json=body)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.get_json()["ids"], [items[0].id])
+        self.assertFalse(resp.get_json()["truncated"])
+        resp = self.client.post("/api/items:transition", json=body)
+        self.assertEqual(resp.get_json()["count"], 0)
+
+    def test_transition_items_truncated(self):
+        """It should list at most BATCH_SIZE_MAX of the changed item ids"""
+        wishlist = self._create_wishlists(1)[0]
+        items = self._create_items(wishlist.id, 3)
+        body = {"status": "expired", "wishlist_id": wishlist.id}
+        config = {"BATCH_SIZE_MAX": 2, "TRANSITION_BATCH_SIZE": 1}
+        with patch.dict(app.config, config):
+            resp = self.client.post("/api/items:transition", json=body)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        data = resp.get_json()
+        self.assertEqual(data["count"], 3)
+        self.assertEqual(data["ids"], sorted(item.id for item in items)[:2])
+        self.assertTrue(data["truncated"])
+
+    def test_transition_items_bad_request(self):
+        """It should not change the status of items with bad criteria"""
+        url = "/api/items:transition"
+        for body in (
+            {"status": "EXPIRED"},
+            {"status": "GONE", "ids": [1]},
+            {"ids": [1]},
+            {"status": "EXPIRED", "ids": ["x"]},
+            {"status": "EXPIRED", "older_than_days": -1},
+            [],
+        ):
+            resp = self.client.post(url, json=body)
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, body)
+        resp = self.client.post(url, data="status=EXPIRED", content_type="text/plain")
+        self.assertEqual(resp.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        with patch.dict(app.config, {"BATCH_SIZE_MAX": 2}):
+            resp = self.client.post(url, json={"status": "EXPIRED", "ids": [1, 2, 3]})
+        self.assertEqual(resp.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_transition_items_bad_request_not_testing(self):
+        """It should answer 400 for bad criteria when exceptions do not propagate"""
+        with patch.dict(app.config, {"TESTING": False}):
+            resp = self.client.post("/api/items:transition", json={"status": "EXPIRED"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(resp.get_json()["error"], "Bad Request")
+
     ######################################################################
     #  I T E M   E N D P O I N T   T E S T   C A S E S
     ######################################################################
@@ -312,6 +860,131 @@ class TestWishlistService(TestCase):
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
         self.assertEqual(resp.get_json(), [])
 
+    def test_list_items_filtered(self):
+        """It should List only the items that match the query arguments"""
+        wishlist = self._create_wishlists(1)[0]
+        items = self._create_items(wishlist.id, count=4)
+        resp = self.client.put(
+            f"{BASE_URL}/{wishlist.id}/items/{items[0].id}/purchase",
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        resp = self.client.get(
+            f"{BASE_URL}/{wishlist.id}/items", query_string="status=purchased"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        data = resp.get_json()
+        self.assertEqual([item["id"] for item in data], [items[0].id])
+
+        resp = self.client.get(
+            f"{BASE_URL}/{wishlist.id}/items", query_string="status=PENDING&name=Item-"
+        )
+        self.assertEqual(len(resp.get_json()), 3)
+
+        resp = self.client.get(
+            f"{BASE_URL}/{wishlist.id}/items",
+            query_string="min_price=100&max_price=100",
+        )
+        self.assertEqual(len(resp.get_json()), 4)
+        resp = self.client.get(
+            f"{BASE_URL}/{wishlist.id}/items", query_string="min_price=100.01"
+        )
+        self.assertEqual(resp.get_json(), [])
+
+    def test_list_items_sorted_and_paginated(self):
+        """It should page through items sorted in descending name order"""
+        wishlist = self._create_wishlists(1)[0]
+        items = self._create_items(wishlist.id, count=5)
+        url = f"{BASE_URL}/{wishlist.id}/items?sort=-name&limit=2"
+        names = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            names.extend(item["name"] for item in resp.get_json())
+            link = resp.headers.get("Link")
+            url = link.split(";")[0].strip("<>") if link else None
+        self.assertEqual(names, sorted((item.name for item in items), reverse=True))
+
+    def test_list_items_next_link_with_route_value(self):
+        """It should link to the next page when a query argument names a route value"""
+        wishlist = self._create_wishlists(1)[0]
+        items = self._create_items(wishlist.id, count=2)
+        resp = self.client.get(
+            f"{BASE_URL}/{wishlist.id}/items", query_string="wishlist_id=5&limit=1"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        next_url = resp.headers["Link"].split(";")[0].strip("<>")
+        self.assertIn(f"{BASE_URL}/{wishlist.id}/items?wishlist_id=5&limit=1", next_url)
+        resp = self.client.get(next_url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.get_json()), 1)
+        self.assertNotEqual(resp.get_json()[0]["id"], items[0].id)
+
+    def test_list_items_bad_arguments(self):
+        """It should not List items with invalid query arguments"""
+        wishlist = self._create_wishlists(1)[0]
+        for query in ("status=unknown", "sort=color", "min_price=cheap", "limit=0"):
+            resp = self.client.get(
+                f"{BASE_URL}/{wishlist.id}/items", query_string=query
+            )
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, query)
+
+    def test_list_items_not_modified(self):
+        """It should answer 304 Not Modified while the item listing is unchanged"""
+        wishlist = self._create_wishlists(1)[0]
+        items = self._create_items(wishlist.id, count=2)
+        url = f"{BASE_URL}/{wishlist.id}/items"
+        etag = self.client.get(url).headers["ETag"]
+        resp = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        resp = self.client.get(url, headers={"If-None-Match": f"W/{etag}"})
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # other query arguments are another representation
+        resp = self.client.get(f"{url}?limit=1", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        resp = self.client.put(f"{url}/{items[0].id}/purchase")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        resp = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp.headers["ETag"], etag)
+
+    def test_get_item_single_query(self):
+        """It should look up the Wishlist and the Item with one query"""
+        wishlist = self._create_wishlists(1)[0]
+        item = self._create_items(wishlist.id, count=1)[0]
+        for url, code in [
+            (f"{BASE_URL}/{wishlist.id}/items/{item.id}", status.HTTP_200_OK),
+            (f"{BASE_URL}/{wishlist.id}/items/0", status.HTTP_404_NOT_FOUND),
+            (f"{BASE_URL}/0/items/{item.id}", status.HTTP_404_NOT_FOUND),
+        ]:
+            with self._count_queries() as statements:
+                resp = self.client.get(url)
+            self.assertEqual(resp.status_code, code)
+            self.assertEqual(len(statements), 1)
+
+    def test_get_item_not_modified(self):
+        """It should answer 304 Not Modified while the Item ETag matches"""
+        wishlist = self._create_wishlists(1)[0]
+        item = self._create_items(wishlist.id, count=1)[0]
+        url = f"{BASE_URL}/{wishlist.id}/items/{item.id}"
+        etag = self.client.get(url).headers["ETag"]
+        resp = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp.get_data(), b"")
+        self.assertEqual(resp.headers["ETag"], etag)
+        resp = self.client.get(url, headers={"If-None-Match": f"W/{etag}"})
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        resp = self.client.put(
+            url, json={"name": "Renamed", "description": "d", "price": 5}
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        resp = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.get_json()["name"], "Renamed")
+
     def test_get_all_items_not_found(self):
         """Test the ability to GET all items"""
         resp = self.client.get(f"{BASE_URL}/0/items", content_type="application/json")
@@ -416,6 +1089,150 @@ class TestWishlistService(TestCase):
         data = response.get_json()
         self.assertIn("already exists", data["message"].lower())
 
+    def test_add_item_query_count(self):
+        """It should Create an item with one existence check and one insert"""
+        wishlist = self._create_wishlists(1)[0]
+        item = ItemFactory(wishlist_id=wishlist.id)
+        with self._count_queries() as statements:
+            resp = self.client.post(
+                f"{BASE_URL}/{wishlist.id}/items",
+                json=item.serialize(),
+                content_type="application/json",
+            )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(statements), 2)
+        self.assertIn("ON CONFLICT", statements[-1])
+
+    # Endpoint: POST /wishlists/{id}/items:batch
+    def test_add_items_batch(self):
+        """It should Create a batch of items in one request"""
+        wishlist = self._create_wishlists(1)[0]
+        items = [
+            ItemFactory(name=f"Gift-{i}", wishlist_id=wishlist.id).serialize()
+            for i in range(20)
+        ]
+        with self._count_queries() as statements:
+            resp = self.client.post(f"{BASE_URL}/{wishlist.id}/items:batch", json=items)
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        # one existence check, one draw of ids and one multi-row insert
+        self.assertEqual(len(statements), 3)
+        results = resp.get_json()
+        self.assertEqual([result["index"] for result in results], list(range(20)))
+        for result in results:
+            self.assertEqual(result["status"], status.HTTP_201_CREATED)
+            resp = self.client.get(f"{BASE_URL}/{wishlist.id}/items/{result['id']}")
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        resp = self.client.get(f"{BASE_URL}/{wishlist.id}/items")
+        self.assertEqual(len(resp.get_json()), 20)
+
+    def test_add_items_batch_partial(self):
+        """It should report the items of a batch that were not created"""
+        wishlist = self._create_wishlists(1)[0]
+        existing = self._create_items(wishlist.id, count=1)[0]
+        items = [
+            ItemFactory(name="New", wishlist_id=wishlist.id).serialize(),
+            ItemFactory(name=existing.name, wishlist_id=wishlist.id).serialize(),
+            {"name": "No price"},
+            ItemFactory(name="New", wishlist_id=wishlist.id).serialize(),
+            "not an item",
+        ]
+        resp = self.client.post(f"{BASE_URL}/{wishlist.id}/items:batch", json=items)
+        self.assertEqual(resp.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            [result["status"] for result in resp.get_json()],
+            [
+                status.HTTP_201_CREATED,
+                status.HTTP_409_CONFLICT,
+                status.HTTP_400_BAD_REQUEST,
+                status.HTTP_409_CONFLICT,
+                status.HTTP_400_BAD_REQUEST,
+            ],
+        )
+        resp = self.client.get(f"{BASE_URL}/{wishlist.id}/items")
+        self.assertEqual(len(resp.get_json()), 2)
+
+    def test_add_items_batch_results_match_rows(self):
+        """It should report exactly the items of a batch that were inserted"""
+        wishlist = self._create_wishlists(1)[0]
+        items = [ItemFactory(wishlist_id=wishlist.id).serialize() for _ in range(5)]
+        for item, name in zip(items, [None, None, 7, "Gift", "Gift"]):
+            item["name"] = name
+        resp = self.client.post(f"{BASE_URL}/{wishlist.id}/items:batch", json=items)
+        self.assertEqual(resp.status_code, status.HTTP_207_MULTI_STATUS)
+        results = resp.get_json()
+        self.assertEqual(
+            [result["status"] for result in results],
+            [
+                status.HTTP_400_BAD_REQUEST,
+                status.HTTP_400_BAD_REQUEST,
+                status.HTTP_400_BAD_REQUEST,
+                status.HTTP_201_CREATED,
+                status.HTTP_409_CONFLICT,
+            ],
+        )
+        resp = self.client.get(f"{BASE_URL}/{wishlist.id}/items")
+        self.assertEqual([item["id"] for item in resp.get_json()], [results[3]["id"]])
+
+    def test_add_items_batch_ndjson(self):
+        """It should Create a batch of items sent as NDJSON"""
+        wishlist = self._create_wishlists(1)[0]
+        lines = [
+            json.dumps(ItemFactory(name=f"Gift-{i}").serialize()) for i in range(3)
+        ]
+        lines.insert(1, "{not json")
+        resp = self.client.post(
+            f"{BASE_URL}/{wishlist.id}/items:batch",
+            data="\n".join(lines) + "\n\n",
+            content_type="application/x-ndjson",
+        )
+        self.assertEqual(resp.status_code, status.HTTP_207_MULTI_STATUS)
+        results = resp.get_json()
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[1]["status"], status.HTTP_400_BAD_REQUEST)
+        for result in results[:1] + results[2:]:
+            self.assertEqual(result["status"], status.HTTP_201_CREATED)
+
+    def test_add_items_batch_bad_requests(self):
+        """It should not Create a batch of items from a bad request"""
+        wishlist = self._create_wishlists(1)[0]
+        url = f"{BASE_URL}/{wishlist.id}/items:batch"
+        resp = self.client.post(f"{BASE_URL}/0/items:batch", json=[])
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+        resp = self.client.post(url, json={"name": "not a list"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        resp = self.client.post(url, data="[]", content_type="text/plain")
+        self.assertEqual(resp.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        with patch.dict(app.config, {"BATCH_SIZE_MAX": 1}):
+            resp = self.client.post(url, json=[{}, {}])
+        self.assertEqual(resp.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_add_items_batch_ndjson_too_large(self):
+        """It should stop reading an NDJSON batch at the first record past the limit"""
+        wishlist = self._create_wishlists(1)[0]
+        lines = [
+            json.dumps(ItemFactory(name=f"Gift-{i}").serialize()) for i in range(50)
+        ]
+        with patch.dict(app.config, {"BATCH_SIZE_MAX": 2}), patch(
+            "service.routes.json.loads", wraps=json.loads
+        ) as loads:
+            resp = self.client.post(
+                f"{BASE_URL}/{wishlist.id}/items:batch",
+                data="\n".join(lines),
+                content_type="application/x-ndjson",
+            )
+        self.assertEqual(resp.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(loads.call_count, 2)
+        resp = self.client.get(f"{BASE_URL}/{wishlist.id}/items")
+        self.assertEqual(resp.get_json(), [])
+
+    def test_add_items_batch_body_too_large(self):
+        """It should not read a batch body larger than MAX_CONTENT_LENGTH"""
+        wishlist = self._create_wishlists(1)[0]
+        items = [ItemFactory(name=f"Gift-{i}").serialize() for i in range(10)]
+        with patch.dict(app.config, {"MAX_CONTENT_LENGTH": 100}):
+            resp = self.client.post(f"{BASE_URL}/{wishlist.id}/items:batch", json=items)
+        self.assertEqual(resp.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
     # Endpoint: GET /wishlists/{id}/items/{id}
     def test_get_item_success(self):
         """It should retrieve an existing item from a wishlist"""
@@ -574,6 +1391,51 @@ class TestWishlistService(TestCase):
         data = response.get_json()
         self.assertIn("already exists", data["message"].lower())
 
+    def test_update_item_statements(self):
+        """It should update an Item with one lookup and one UPDATE"""
+        wishlist = self._create_wishlists(1)[0]
+        item = self._create_items(wishlist.id, count=1)[0]
+        with self._count_queries() as statements:
+            resp = self.client.put(
+                f"{BASE_URL}/{wishlist.id}/items/{item.id}",
+                json={"name": "Renamed", "description": "d", "price": 5},
+            )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.get_json()["name"], "Renamed")
+        # the lookup, the UPDATE and the reload of the committed Item
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(
+            [sql for sql in statements if sql.startswith("UPDATE")],
+            [statements[1]],
+        )
+
+    def test_update_item_bad_data(self):
+        """It should return 400 and change nothing when the body is incomplete"""
+        wishlist = self._create_wishlists(1)[0]
+        item = self._create_items(wishlist.id, count=1)[0]
+        url = f"{BASE_URL}/{wishlist.id}/items/{item.id}"
+        for data in [
+            {"name": "Renamed"},
+            {"name": "Renamed", "description": "d", "price": "x"},
+        ]:
+            resp = self.client.put(url, json=data)
+            self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url).get_json()["name"], item.name)
+
+    def test_update_item_bad_data_not_testing(self):
+        """It should return 400 for an incomplete body when exceptions do not propagate"""
+        wishlist = self._create_wishlists(1)[0]
+        item = self._create_items(wishlist.id, count=1)[0]
+        url = f"{BASE_URL}/{wishlist.id}/items/{item.id}"
+        with patch.dict(app.config, {"TESTING": False}):
+            for data in [
+                {"name": "Renamed"},
+                {"name": "Renamed", "description": "d", "price": "x"},
+            ]:
+                resp = self.client.put(url, json=data)
+                self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url).get_json()["name"], item.name)
+
     def test_update_item_unexpected_error(self):
         """It should return 400 when updating an item with a name exceeding length limit"""
         # Create a wishlist and two items
@@ -600,6 +1462,62 @@ class TestWishlistService(TestCase):
         # Assert that it should return 500 Internal Server Error
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_update_item_if_match(self):
+        """It should only Update an Item when If-Match holds its current ETag"""
+        wishlist = self._create_wishlists(1)[0]
+        item = self._create_items(wishlist.id, count=1)[0]
+        url = f"{BASE_URL}/{wishlist.id}/items/{item.id}"
+        etag = self.client.get(url).headers["ETag"]
+        data = {"name": "first", "description": "d", "price": 5}
+
+        resp = self.client.put(url, json=data, headers={"If-Match": etag})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(resp.headers["ETag"], etag)
+
+        data["name"] = "second"
+        resp = self.client.put(url, json=data, headers={"If-Match": etag})
+        self.assertEqual(resp.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        resp = self.client.put(f"{url}/purchase", headers={"If-Match": etag})
+        self.assertEqual(resp.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        resp = self.client.get(url)
+        self.assertEqual(resp.get_json()["name"], "first")
+        self.assertEqual(resp.get_json()["status"], ItemStatus.PENDING.value)
+
+        resp = self.client.put(
+            f"{url}/purchase", headers={"If-Match": resp.headers["ETag"]}
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.get_json()["status"], ItemStatus.PURCHASED.value)
+
+    def test_update_item_lost_race(self):
+        """It should return 412 when another update commits first"""
+        wishlist = self._create_wishlists(1)[0]
+        item = self._create_items(wishlist.id, count=1)[0]
+        with patch(
+            "service.models.Item.update",
+            side_effect=StaleVersionError("Item was changed by another request"),
+        ):
+            resp = self.client.put(f"{BASE_URL}/{wishlist.id}/items/{item.id}/purchase")
+        self.assertEqual(resp.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertIn("another request", resp.get_json()["message"])
+
+    def test_update_item_lost_race_not_testing(self):
+        """It should return 412 for a lost race when exceptions do not propagate"""
+        wishlist = self._create_wishlists(1)[0]
+        item = self._create_items(wishlist.id, count=1)[0]
+        url = f"{BASE_URL}/{wishlist.id}/items/{item.id}"
+        data = {"name": "Renamed", "description": "d", "price": 5}
+        with patch.dict(app.config, {"TESTING": False}), patch(
+            "service.models.Item.update",
+            side_effect=StaleVersionError("Item was changed by another request"),
+        ):
+            for resp in (
+                self.client.put(url, json=data),
+                self.client.put(f"{url}/purchase"),
+            ):
+                self.assertEqual(resp.status_code, status.HTTP_412_PRECONDITION_FAILED)
+                self.assertEqual(resp.get_json()["error"], "Precondition Failed")
+
     # Endpoint: DELETE   /wishlists/{id}/items/{id}
     def test_delete_item_success(self):
         """It should delete an existing item from a wishlist"""
@@ -0,0 +1,49 @@
+######################################################################
+# Copyright 2016, 2024 John J. Rofrano. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+######################################################################
+
+"""
+Serialization Test Suite
+"""
+
+import json
+from unittest import TestCase
+from service.common import status
+from service.common.serialization import dumps, json_response
+
+
+######################################################################
+#  T E S T   C A S E S
+######################################################################
+class TestSerialization(TestCase):
+    """JSON Rendering Tests"""
+
+    def test_dumps(self):
+        """It should encode a document as compact JSON bytes"""
+        document = [{"id": 1, "name": "pen", "price": 1.5, "items": []}]
+        data = dumps(document)
+        self.assertIsInstance(data, bytes)
+        self.assertNotIn(b" ", data)
+        self.assertEqual(json.loads(data), document)
+
+    def test_json_response(self):
+        """It should answer with the encoded document and the headers"""
+        response = json_response(
+            {"id": 1}, code=status.HTTP_201_CREATED, headers={"Link": "<x>"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.mimetype, "application/json")
+        self.assertEqual(response.headers["Link"], "<x>")
+        self.assertEqual(json.loads(response.get_data()), {"id": 1})
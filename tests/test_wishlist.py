@@ -7,7 +7,8 @@ import os
 from unittest.mock import patch
 from datetime import timedelta
 
-from service.models import Wishlist, Item, DataValidationError
+from sqlalchemy import text
+from service.models import db, Wishlist, Item, DataValidationError
 from tests.factories import WishlistFactory, ItemFactory
 from tests.test_base import BaseTestCase
 
@@ -19,6 +20,7 @@ DATABASE_URI = os.getenv(
 ######################################################################
 #        W I S H L I S T   M O D E L   T E S T   C A S E S
 ######################################################################
+# pylint: disable=too-many-public-methods
 class TestWishlist(BaseTestCase):
     """Wishlist Model Test Cases"""
 
@@ -87,6 +89,19 @@ class TestWishlist(BaseTestCase):
         wishlists = Wishlist.all()
         self.assertEqual(len(wishlists), 0)
 
+    def test_delete_a_wishlist_with_items(self):
+        """It should Delete a wishlist together with its loaded items"""
+        wishlist = WishlistFactory()
+        wishlist.create()
+        for name in ("pen", "book"):
+            ItemFactory(wishlist=wishlist, name=name).create()
+        db.session.expire_all()
+        wishlist = Wishlist.find(wishlist.id)
+        self.assertEqual(len(wishlist.items), 2)
+        wishlist.delete()
+        self.assertEqual(Wishlist.all(), [])
+        self.assertEqual(Item.all(), [])
+
     @patch("service.models.db.session.commit")
     def test_delete_wishlist_failed(self, exception_mock):
         """It should not delete a Wishlist on database error"""
@@ -103,6 +118,18 @@ class TestWishlist(BaseTestCase):
         wishlists = Wishlist.all()
         self.assertEqual(len(wishlists), 5)
 
+    def test_keyset_page(self):
+        """It should return a page of Wishlists and the next cursor"""
+        for wishlist in WishlistFactory.create_batch(5):
+            wishlist.create()
+        ids = sorted(wishlist.id for wishlist in Wishlist.all())
+        page, next_id = Wishlist.keyset_page(Wishlist.query, limit=3)
+        self.assertEqual([wishlist.id for wishlist in page], ids[:3])
+        self.assertEqual(next_id, ids[2])
+        page, next_id = Wishlist.keyset_page(Wishlist.query, next_id, 3)
+        self.assertEqual([wishlist.id for wishlist in page], ids[3:])
+        self.assertIsNone(next_id)
+
     def test_find_by_name(self):
         """It should Find a Wishlist by name"""
         wishlist = WishlistFactory()
@@ -176,6 +203,12 @@ class TestWishlist(BaseTestCase):
         wishlist = Wishlist()
         self.assertRaises(DataValidationError, wishlist.deserialize, [])
 
+    def test_deserialize_with_value_error(self):
+        """It should not Deserialize a wishlist with a bad date"""
+        data = WishlistFactory().serialize()
+        data["date_created"] = "01/02/2024"
+        self.assertRaises(DataValidationError, Wishlist().deserialize, data)
+
     def test_deserialize_item_key_error(self):
         """It should not Deserialize an item with a KeyError"""
         item = Item()
@@ -206,3 +239,27 @@ class TestWishlist(BaseTestCase):
         exception_mock.side_effect = Exception()
         wishlist = WishlistFactory()
         self.assertRaises(DataValidationError, wishlist.update)
+
+    def test_version_follows_item_writes(self):
+        """It should change the version of a Wishlist on every write of an Item"""
+        wishlist = WishlistFactory()
+        wishlist.create()
+        item = ItemFactory(wishlist=wishlist)
+        item.create()
+        version = Wishlist.find_version(wishlist.id)
+        self.assertEqual(Wishlist.find(wishlist.id).version(), version)
+
+        # a write in the same transaction keeps the updated_at of the Item
+        db.session.execute(
+            text(
+                "UPDATE item SET version_id = version_id + 1, updated_at = updated_at"
+                " WHERE id = :id"
+            ),
+            {"id": item.id},
+        )
+        db.session.commit()
+        db.session.expire_all()
+        new_version = Wishlist.find_version(wishlist.id)
+        self.assertNotEqual(new_version, version)
+        self.assertEqual(Wishlist.find(wishlist.id).version(), new_version)
+        self.assertIsNone(Wishlist.find_version(0))